@@ -0,0 +1,160 @@
+# benchmarks/bench_collection.py
+"""Throughput benchmark of the collection path against the local fake VK server.
+
+    python benchmarks/bench_collection.py
+    python benchmarks/bench_collection.py --sizes 100 1000 --latency 0.02 --engine both
+
+Reports users/sec, HTTP requests per user and two latencies:
+    http p50/p99  -- the HTTP request alone (no rate-limiter sleeps, no waiting
+                     for a pooled connection), comparable to --latency
+    call p50/p99  -- a whole API call as the engine sees it, including
+                     rate-limiter sleeps, connection-pool queueing and retries
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from tests.fake_vk_server import FakeVKServer
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def timed(func, latencies):
+    def wrapper(*args, **kwargs):
+        started = time.monotonic()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            latencies.append(time.monotonic() - started)
+    return wrapper
+
+def run_sync(vk_id_pairs, server, rps):
+    from vk_api import VKClient, iter_users_info
+
+    http_latencies, call_latencies = [], []
+    client = VKClient(tokens=['bench-token'], api_url=server.api_url, rps=rps)
+    client.session.get = timed(client.session.get, http_latencies)
+    client.call = timed(client.call, call_latencies)
+    users = [full_user for _, full_user in iter_users_info(vk_id_pairs, client)]
+    client.close()
+    return users, http_latencies, call_latencies
+
+def http_trace(latencies):
+    """aiohttp trace that records request time minus time spent waiting for a pooled connection."""
+    import aiohttp
+
+    async def on_request_start(session, ctx, params):
+        ctx.started = time.monotonic()
+        ctx.queued = 0.0
+
+    async def on_queued_start(session, ctx, params):
+        ctx.queued_at = time.monotonic()
+
+    async def on_queued_end(session, ctx, params):
+        ctx.queued += time.monotonic() - ctx.queued_at
+
+    async def on_request_end(session, ctx, params):
+        latencies.append(time.monotonic() - ctx.started - ctx.queued)
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_request_start)
+    trace.on_connection_queued_start.append(on_queued_start)
+    trace.on_connection_queued_end.append(on_queued_end)
+    trace.on_request_end.append(on_request_end)
+    return trace
+
+def run_async(vk_id_pairs, server, rps):
+    import functools
+    import aiohttp
+    import vk_api_async
+
+    http_latencies, latencies = [], []
+    original_call = vk_api_async.call_method
+    original_session = aiohttp.ClientSession
+
+    async def timed_call(session, limiter, method, **params):
+        started = time.monotonic()
+        try:
+            return await original_call(session, limiter, method, **params)
+        finally:
+            latencies.append(time.monotonic() - started)
+
+    vk_api_async.call_method = timed_call
+    vk_api_async.API_URL = server.api_url
+    aiohttp.ClientSession = functools.partial(original_session, trace_configs=[http_trace(http_latencies)])
+    try:
+        users = vk_api_async.get_users_info_concurrent(vk_id_pairs, rps=rps, tokens=['bench-token'])
+    finally:
+        vk_api_async.call_method = original_call
+        aiohttp.ClientSession = original_session
+    return users, http_latencies, latencies
+
+def bench(engine, size, args):
+    server = FakeVKServer(
+        latency=args.latency, closed_ratio=args.closed_ratio,
+        error6_ratio=args.error6_ratio, rate_limit=args.server_rate_limit
+    ).start()
+    vk_id_pairs = [(i, i) for i in range(1, size + 1)]
+    runner = run_sync if engine == 'sync' else run_async
+
+    started = time.monotonic()
+    users, http_latencies, call_latencies = runner(vk_id_pairs, server, args.rps)
+    elapsed = time.monotonic() - started
+    server.stop()
+
+    http_latencies.sort()
+    call_latencies.sort()
+    requests_total = server.requests_total()
+    return {
+        'engine': engine,
+        'users': len(users),
+        'seconds': elapsed,
+        'users_per_sec': len(users) / elapsed if elapsed else 0.0,
+        'requests_per_user': requests_total / len(users) if users else 0.0,
+        'api_calls_per_user': server.api_calls / len(users) if users else 0.0,
+        'http_p50': percentile(http_latencies, 0.5),
+        'http_p99': percentile(http_latencies, 0.99),
+        'call_p50': percentile(call_latencies, 0.5),
+        'call_p99': percentile(call_latencies, 0.99),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Collection throughput benchmark on the fake VK API")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000], help='Numbers of users')
+    parser.add_argument('--engine', choices=['sync', 'async', 'both'], default='both')
+    parser.add_argument('--latency', type=float, default=0.01, help='Fake server latency per request, seconds')
+    parser.add_argument('--closed-ratio', type=float, default=0.2, help='Share of closed profiles (errors 15/30)')
+    parser.add_argument('--error6-ratio', type=float, default=0.0, help='Share of requests failing with error 6')
+    parser.add_argument('--server-rate-limit', type=int, default=None, help='Fake server requests/sec per token')
+    parser.add_argument('--rps', type=float, default=1000, help='Client rate limit, requests/sec per token')
+    args = parser.parse_args()
+
+    # Collection only: no DB writes, output of the engines is silenced
+    os.environ['APP_MODE'] = 'memory'
+    engines = ['sync', 'async'] if args.engine == 'both' else [args.engine]
+
+    print(f"{'engine':<7}{'users':>8}{'seconds':>10}{'users/s':>10}{'req/user':>10}{'calls/user':>11}"
+          f"{'http p50':>10}{'http p99':>10}{'call p50':>10}{'call p99':>10}  (ms)")
+    for size in args.sizes:
+        for engine in engines:
+            stdout = sys.stdout
+            sys.stdout = open(os.devnull, 'w')
+            try:
+                result = bench(engine, size, args)
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+            print(f"{result['engine']:<7}{result['users']:>8}{result['seconds']:>10.2f}{result['users_per_sec']:>10.1f}"
+                  f"{result['requests_per_user']:>10.3f}{result['api_calls_per_user']:>11.2f}"
+                  f"{result['http_p50'] * 1000:>10.1f}{result['http_p99'] * 1000:>10.1f}"
+                  f"{result['call_p50'] * 1000:>10.1f}{result['call_p99'] * 1000:>10.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+# collector_daemon.py
+"""Long-running collector service.
+
+Started with `python main.py --daemon`. Keeps the process (HTTP connection pool,
+token limiter, counters cache, photo cache) alive between collections instead of
+paying interpreter and import start-up for every refresh from the web app.
+
+Collections run on a schedule (COLLECTOR_INTERVAL) and on request over a local
+socket (multiprocessing.connection with COLLECTOR_AUTHKEY). Messages are JSON,
+never pickles, and the daemon refuses to start without its own authkey.
+Requests that arrive while a collection is running are coalesced into a single
+next run.
+
+    reply = send_command('collect', wait=True, timeout=300)
+    if reply is None:
+        ...  # daemon is not running, collect in-process (see web_app.run_refresh)
+"""
+import json
+import threading
+import time
+from multiprocessing.connection import Listener, Client
+
+from config import COLLECTOR_HOST, COLLECTOR_PORT, COLLECTOR_INTERVAL, COLLECTOR_AUTHKEY, SECRET_KEY
+
+WEAK_AUTHKEYS = {b'key', b'your-key', b'secret', b'changeme'}  # values from examples and defaults
+MAX_MESSAGE_BYTES = 64 * 1024
+
+def _authkey(authkey=None):
+    """Key as bytes. Raises ValueError for a missing or example key and for
+    FLASK_SECRET_KEY, so the socket is never protected by a guessable secret."""
+    authkey = COLLECTOR_AUTHKEY if authkey is None else authkey
+    authkey = authkey.encode('utf-8') if isinstance(authkey, str) else authkey
+    if not authkey or authkey in WEAK_AUTHKEYS or authkey == SECRET_KEY.encode('utf-8'):
+        raise ValueError("COLLECTOR_AUTHKEY must be set to its own secret "
+                         "(not empty, not an example value, not FLASK_SECRET_KEY)")
+    return authkey
+
+def _send(conn, message):
+    conn.send_bytes(json.dumps(message).encode('utf-8'))
+
+def _recv(conn):
+    return json.loads(conn.recv_bytes(MAX_MESSAGE_BYTES).decode('utf-8'))
+
+class CollectorDaemon:
+    """Runs collect() on one worker thread, on schedule or on request.
+
+    collect  -- callable doing one collection, returns the number of users
+    interval -- seconds between scheduled collections (0 - only on request)
+    """
+
+    def __init__(self, collect, interval=COLLECTOR_INTERVAL, host=COLLECTOR_HOST,
+                 port=COLLECTOR_PORT, authkey=None):
+        self.collect = collect
+        self.interval = interval
+        self.address = (host, port)
+        self.authkey = _authkey(authkey)
+        self.cond = threading.Condition()
+        self.requested = 0  # number of the run that has to happen next
+        self.started = 0
+        self.completed = 0
+        self.running = False
+        self.stopping = False
+        self.last_result = {}
+        self.listener = None
+        self.threads = []
+
+    # --- Collection worker ---
+
+    def request(self):
+        """Asks for a collection and returns its run number.
+        While a run is in progress all requests share the one after it."""
+        with self.cond:
+            self.requested = self.started + 1
+            self.cond.notify_all()
+            return self.requested
+
+    def wait_for(self, run, timeout=None):
+        """Waits until the run has finished. Returns False on timeout or stop."""
+        with self.cond:
+            self.cond.wait_for(lambda: self.completed >= run or self.stopping, timeout)
+            return self.completed >= run
+
+    def _worker(self):
+        next_scheduled = time.monotonic() + self.interval if self.interval else None
+        while True:
+            with self.cond:
+                while not self.stopping and self.requested <= self.started:
+                    if next_scheduled is None:
+                        self.cond.wait()
+                        continue
+                    remaining = next_scheduled - time.monotonic()
+                    if remaining <= 0:
+                        self.requested = self.started + 1
+                        break
+                    self.cond.wait(remaining)
+                if self.stopping:
+                    return
+                self.started += 1
+                self.running = True
+
+            print(f"🔄 Collection #{self.started} started...")
+            started_at = time.time()
+            result = {'run': self.started, 'started': started_at}
+            try:
+                result['collected'] = self.collect()
+                print(f"✅ Collection #{self.started} done in {time.time() - started_at:.1f}s.")
+            except Exception as e:
+                result['error'] = str(e)
+                print(f"❌ Collection #{self.started} failed: {e}")
+            result['duration'] = time.time() - started_at
+
+            with self.cond:
+                self.running = False
+                self.completed = self.started
+                self.last_result = result
+                self.cond.notify_all()
+            if self.interval:
+                next_scheduled = time.monotonic() + self.interval
+
+    # --- Commands ---
+
+    def status(self):
+        with self.cond:
+            return {
+                'status': 'ok',
+                'running': self.running,
+                'pending': self.requested > self.started,
+                'runs': self.completed,
+                'interval': self.interval,
+                'last': dict(self.last_result),
+            }
+
+    def handle(self, message):
+        if not isinstance(message, dict):
+            return {'status': 'error', 'message': 'Command should be a JSON object'}
+        command = message.get('command')
+        if command == 'collect':
+            run = self.request()
+            if not message.get('wait'):
+                return {'status': 'ok', 'message': f"Collection #{run} queued", 'run': run}
+            if not self.wait_for(run, message.get('timeout')):
+                return {'status': 'error', 'message': f"Collection #{run} did not finish in time", 'run': run}
+            result = self.status()['last']
+            if result.get('error'):
+                return {'status': 'error', 'message': result['error'], 'run': run}
+            return {'status': 'ok', 'message': f"Collected {result.get('collected')} users", 'run': run,
+                    'result': result}
+        if command == 'status':
+            return self.status()
+        if command == 'stop':
+            threading.Thread(target=self.stop, daemon=True).start()
+            return {'status': 'ok', 'message': 'Stopping'}
+        return {'status': 'error', 'message': f"Unknown command: {command}"}
+
+    def _serve_connection(self, conn):
+        try:
+            with conn:
+                _send(conn, self.handle(_recv(conn)))
+        except (EOFError, OSError):
+            pass
+        except Exception as e:
+            print(f"❌ Collector command failed: {e}")
+
+    def _serve(self):
+        while not self.stopping:
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                if self.stopping:
+                    return
+                continue
+            except Exception as e:  # AuthenticationError from a client with a wrong key
+                print(f"⚠️ Rejected collector connection: {e}")
+                continue
+            if self.stopping:
+                conn.close()
+                return
+            threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+    # --- Lifecycle ---
+
+    def start(self):
+        self.listener = Listener(self.address, authkey=self.authkey)
+        self.address = self.listener.address
+        self.threads = [
+            threading.Thread(target=self._worker, name='collector', daemon=True),
+            threading.Thread(target=self._serve, name='collector-ipc', daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        with self.cond:
+            if self.stopping:
+                return
+            self.stopping = True
+            self.cond.notify_all()
+        try:
+            # Wake up the blocked accept()
+            Client(self.address, authkey=self.authkey).close()
+        except Exception:
+            pass
+        self.listener.close()
+
+    def run(self):
+        """Starts the daemon, runs the first collection and blocks until stopped."""
+        self.start()
+        host, port = self.address
+        schedule = f"every {self.interval}s" if self.interval else "on request only"
+        print(f"📡 Collector daemon listening on {host}:{port}, collecting {schedule}. Ctrl+C to stop.")
+        self.request()
+        try:
+            while not self.stopping:
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            print("\n⏹️ Collector daemon stopped.")
+        finally:
+            self.stop()
+
+def send_command(command, timeout=None, host=COLLECTOR_HOST, port=COLLECTOR_PORT, authkey=None, **params):
+    """Sends a command to a running daemon and returns its reply.
+    Returns None when no daemon is listening or COLLECTOR_AUTHKEY is not set
+    (the daemon does not start without it)."""
+    try:
+        conn = Client((host, port), authkey=_authkey(authkey))
+    except (ConnectionRefusedError, FileNotFoundError, ValueError):
+        return None
+    with conn:
+        _send(conn, dict(params, command=command, timeout=timeout))
+        if not conn.poll(timeout):
+            return {'status': 'error', 'message': f"Collector daemon did not answer in {timeout}s"}
+        return _recv(conn)
@@ -12,14 +12,65 @@ DB_CONFIG = {
     'charset': os.getenv('DB_CHARSET', 'utf8mb4')
 }
 
+APP_MODE = os.getenv('APP_MODE', 'memory').lower()
+DB_BACKEND = os.getenv('DB_BACKEND', 'mysql').lower()  # mysql or sqlite, see storage.py
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'vk_monitor.db')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()  # DEBUG shows every user and request
+DB_WRITE_BATCH_SIZE = int(os.getenv('DB_WRITE_BATCH_SIZE', 95))  # users per writer flush (one users.get chunk)
+
 VK_ACCESS_TOKEN = os.getenv('VK_ACCESS_TOKEN')
+# Several tokens (comma separated) spread the load, each one has its own quota
+VK_ACCESS_TOKENS = [token.strip() for token in os.getenv('VK_ACCESS_TOKENS', '').split(',') if token.strip()]
+if not VK_ACCESS_TOKENS and VK_ACCESS_TOKEN:
+    VK_ACCESS_TOKENS = [VK_ACCESS_TOKEN]
+if not VK_ACCESS_TOKEN and VK_ACCESS_TOKENS:
+    VK_ACCESS_TOKEN = VK_ACCESS_TOKENS[0]
 API_VERSION = os.getenv('API_VERSION', '5.199')
+VK_API_URL = os.getenv('VK_API_URL', 'https://api.vk.com/method/')  # can point to a local stand-in server
+VK_POOL_SIZE = int(os.getenv('VK_POOL_SIZE', 10))
+VK_RPS = float(os.getenv('VK_RPS', 3))  # requests per second allowed for one token
+VK_MAX_RETRIES = int(os.getenv('VK_MAX_RETRIES', 5))  # retries on rate limit errors (6, 9, 10, 29)
+VK_WORKERS = int(os.getenv('VK_WORKERS', 1))  # processes for main.py --workers
 OUTPUT_HTML = os.getenv('OUTPUT_HTML', 'vk_users_status.html')
 
+# --- Counters cache: TTL in seconds for every counter ---
+COUNTERS_CACHE_FILE = os.getenv('COUNTERS_CACHE_FILE', 'counters_cache.json')
+COUNTER_TTLS = {
+    'friends_count': int(os.getenv('FRIENDS_COUNT_TTL', 6 * 3600)),
+    'followers_count': int(os.getenv('FOLLOWERS_COUNT_TTL', 12 * 3600)),
+    'subscriptions_count': int(os.getenv('SUBSCRIPTIONS_COUNT_TTL', 24 * 3600)),
+    'groups_count': int(os.getenv('GROUPS_COUNT_TTL', 24 * 3600)),
+    'wall_count': int(os.getenv('WALL_COUNT_TTL', 6 * 3600)),
+}
+CLOSED_PROFILE_TTL = int(os.getenv('CLOSED_PROFILE_TTL', 7 * 24 * 3600))  # errors 15/30 are not retried before it
+
+# --- Scheduler mode (main.py --schedule), seconds ---
+ONLINE_POLL_INTERVAL = int(os.getenv('ONLINE_POLL_INTERVAL', 60))  # online / last_seen sweep
+COUNTERS_POLL_INTERVAL = int(os.getenv('COUNTERS_POLL_INTERVAL', 3600))  # friends, followers, groups, wall
+
 CALENDAR_HTML = 'vk_birthday_calendar.html'
 
+# --- Photo cache ---
+PHOTO_CACHE_DIR = os.getenv('PHOTO_CACHE_DIR', 'photo_cache')
+PHOTO_CACHE_MAX_MB = int(os.getenv('PHOTO_CACHE_MAX_MB', 200))
+PHOTO_CACHE_REVALIDATE = int(os.getenv('PHOTO_CACHE_REVALIDATE', 24 * 3600))  # seconds before ETag check
+# Avatars are shown at 50px, thumbnails keep 2x for HiDPI screens
+PHOTO_THUMBNAILS = os.getenv('PHOTO_THUMBNAILS', 'True').lower() in ('true', '1', 'yes')
+PHOTO_THUMB_SIZE = int(os.getenv('PHOTO_THUMB_SIZE', 100))
+PHOTO_THUMB_FORMAT = os.getenv('PHOTO_THUMB_FORMAT', 'WEBP').upper()  # WEBP or JPEG
+PHOTO_THUMB_QUALITY = int(os.getenv('PHOTO_THUMB_QUALITY', 80))
+PHOTO_WORKERS = int(os.getenv('PHOTO_WORKERS', VK_POOL_SIZE))  # parallel photo downloads
+PHOTO_PER_HOST = int(os.getenv('PHOTO_PER_HOST', 4))  # parallel downloads from one host
+
+# --- Collector daemon (main.py --daemon) ---
+COLLECTOR_HOST = os.getenv('COLLECTOR_HOST', '127.0.0.1')
+COLLECTOR_PORT = int(os.getenv('COLLECTOR_PORT', 5001))
+COLLECTOR_INTERVAL = int(os.getenv('COLLECTOR_INTERVAL', 600))  # seconds, 0 - only on request
+COLLECTOR_TIMEOUT = int(os.getenv('COLLECTOR_TIMEOUT', 1800))  # seconds a web refresh waits for the daemon
+
 FLASK_HOST = os.getenv('FLASK_HOST', '127.0.0.1')
 FLASK_PORT = int(os.getenv('FLASK_PORT', 5000))
 FLASK_DEBUG = os.getenv('FLASK_DEBUG', 'False').lower() in ('true', '1', 'yes')
 SECRET_KEY = os.getenv('FLASK_SECRET_KEY', 'your-key')
+COLLECTOR_AUTHKEY = os.getenv('COLLECTOR_AUTHKEY', '')  # shared by web app and daemon, required for --daemon
 STATISTICS_HTML = os.getenv('STATISTICS_HTML', 'statistics.html')
@@ -0,0 +1,97 @@
+# counters_cache.py
+import json
+import os
+import time
+from config import COUNTERS_CACHE_FILE, COUNTER_TTLS, CLOSED_PROFILE_TTL
+
+def signals_of(vk_user):
+    """Free change signals from users.get: counters.friends and counters.photos."""
+    counters = vk_user.get('counters', {})
+    return {'friends': counters.get('friends'), 'photos': counters.get('photos')}
+
+class CountersCache:
+    """Persistent cache of per-user counters (friends, followers, subscriptions, groups, wall).
+    Every counter has its own TTL. Counters closed by errors 15/30 are cached
+    as None for CLOSED_PROFILE_TTL. A change of counters.friends / counters.photos
+    in users.get invalidates the whole entry."""
+
+    def __init__(self, path=COUNTERS_CACHE_FILE, ttls=None, closed_ttl=CLOSED_PROFILE_TTL):
+        self.path = path
+        self.ttls = dict(ttls or COUNTER_TTLS)
+        self.closed_ttl = closed_ttl
+        # vk_id -> {'values': {field: value}, 'expires': {field: timestamp}, 'signals': {...}}
+        self.entries = {}
+
+    @classmethod
+    def load(cls, path=COUNTERS_CACHE_FILE, **kwargs):
+        cache = cls(path, **kwargs)
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    cache.entries = {int(vk_id): entry for vk_id, entry in json.load(f).items()}
+                print(f"🗃️ Counters cache loaded: {len(cache.entries)} users")
+            except Exception as e:
+                print(f"⚠️ Cannot read counters cache {path}: {e}")
+        return cache
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"⚠️ Cannot save counters cache {self.path}: {e}")
+
+    def __contains__(self, vk_id):
+        return vk_id in self.entries
+
+    def stale_fields(self, vk_user, check_ttl=True, now=None):
+        """Counters of the user that have to be requested from VK.
+        With check_ttl=False only users missing from the cache (or with changed signals) are requested."""
+        now = now or time.time()
+        entry = self.entries.get(vk_user['id'])
+        if entry is None or entry['signals'] != signals_of(vk_user):
+            return list(self.ttls)
+        if not check_ttl:
+            return []
+        return [field for field in self.ttls if entry['expires'].get(field, 0) <= now]
+
+    def plan(self, vk_users, check_ttl=True):
+        """Returns {vk_id: [fields]} for users that need any counter requested."""
+        now = time.time()
+        fields_by_id = {}
+        for vk_user in vk_users:
+            fields = self.stale_fields(vk_user, check_ttl, now)
+            if fields:
+                fields_by_id[vk_user['id']] = fields
+        return fields_by_id
+
+    def store(self, vk_user, counters, closed=()):
+        """Saves freshly requested counters; fields in `closed` are negative-cached.
+        Other None values are temporary failures: the cached value is kept and expires now."""
+        now = time.time()
+        vk_id = vk_user['id']
+        signals = signals_of(vk_user)
+        entry = self.entries.get(vk_id)
+        if entry is None or entry['signals'] != signals:
+            entry = {'values': {}, 'expires': {}, 'signals': signals}
+            self.entries[vk_id] = entry
+
+        for field, value in counters.items():
+            if value is not None:
+                ttl = self.ttls.get(field, 0)
+            elif (vk_id, field) in closed:
+                ttl = self.closed_ttl
+            else:
+                # Temporary failure (timeout, throttling): keep the last known value, request again next time
+                entry['expires'][field] = now
+                continue
+            entry['values'][field] = value
+            entry['expires'][field] = now + ttl
+
+    def get(self, vk_id):
+        values = self.entries.get(vk_id, {}).get('values', {})
+        return {field: values.get(field) for field in self.ttls}
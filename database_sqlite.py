@@ -0,0 +1,376 @@
+# database_sqlite.py
+"""SQLite storage backend with the same functions as database.py.
+
+Selected with DB_BACKEND=sqlite (see storage.py). One file, no server:
+WAL journal (readers do not block the DB writer), tuned pragmas and indexes
+for the queries below. The schema is created once per process; every thread
+keeps its own connection for its lifetime, so long-lived threads (DB writer,
+collector) connect once, while a short-lived thread (a Flask request) only
+pays for the connect and the per-connection pragmas.
+
+Tables:
+    vk_users        -- tracked users (id is the db_id used everywhere)
+    user_status     -- one row per collected snapshot
+    latest_status   -- newest snapshot per user, upserted with every save
+    photos          -- avatar bytes stored once per sha256, referenced by id
+    archived_users  -- users removed from the list, for restore
+"""
+import base64
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from config import SQLITE_PATH
+
+__all__ = [
+    'connect_db', 'load_vk_ids', 'add_vk_user', 'delete_vk_user', 'load_archived_users',
+    'restore_user_from_archive', 'save_to_db', 'save_users_bulk', 'load_users_with_latest_photos',
+    'load_user_visits_for_chart', 'load_activity_stats', 'load_weekly_activity_stats',
+    'load_city_activity_stats',
+]
+
+# Per connection; journal_mode = WAL is stored in the file and set by init_db()
+PRAGMAS = (
+    'PRAGMA synchronous = NORMAL',  # safe with WAL, no fsync per commit
+    'PRAGMA foreign_keys = ON',
+    'PRAGMA busy_timeout = 5000',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -20000',  # KiB
+    'PRAGMA mmap_size = 268435456',
+)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS vk_users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    vk_id INTEGER NOT NULL UNIQUE,
+    added_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS photos (
+    id INTEGER PRIMARY KEY,
+    sha256 TEXT NOT NULL UNIQUE,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS user_status (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    checked_at INTEGER NOT NULL,
+    name TEXT,
+    online INTEGER NOT NULL DEFAULT 0,
+    last_seen INTEGER,
+    platform INTEGER,
+    photo_200 TEXT,
+    photo_id INTEGER REFERENCES photos(id),
+    city TEXT,
+    bdate TEXT,
+    relation INTEGER,
+    friends_count INTEGER,
+    followers_count INTEGER,
+    subscriptions_count INTEGER,
+    groups_count INTEGER,
+    wall_count INTEGER,
+    photos_count INTEGER,
+    domain TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_user_status_user_time ON user_status (user_id, checked_at);
+CREATE INDEX IF NOT EXISTS idx_user_status_online_time ON user_status (checked_at, user_id) WHERE online = 1;
+CREATE TABLE IF NOT EXISTS latest_status (
+    user_id INTEGER PRIMARY KEY,
+    checked_at INTEGER NOT NULL,
+    name TEXT,
+    online INTEGER NOT NULL DEFAULT 0,
+    last_seen INTEGER,
+    platform INTEGER,
+    photo_200 TEXT,
+    photo_id INTEGER REFERENCES photos(id),
+    city TEXT,
+    bdate TEXT,
+    relation INTEGER,
+    friends_count INTEGER,
+    followers_count INTEGER,
+    subscriptions_count INTEGER,
+    groups_count INTEGER,
+    wall_count INTEGER,
+    photos_count INTEGER,
+    domain TEXT
+);
+CREATE TABLE IF NOT EXISTS archived_users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    original_id INTEGER NOT NULL,
+    original_vkid INTEGER NOT NULL,
+    original_name TEXT,
+    archived_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_archived_users_time ON archived_users (archived_at);
+'''
+
+STATUS_COLUMNS = (
+    'user_id', 'checked_at', 'name', 'online', 'last_seen', 'platform', 'photo_200', 'photo_id',
+    'city', 'bdate', 'relation', 'friends_count', 'followers_count', 'subscriptions_count',
+    'groups_count', 'wall_count', 'photos_count', 'domain',
+)
+INSERT_STATUS = (f"INSERT INTO user_status ({', '.join(STATUS_COLUMNS)}) "
+                 f"VALUES ({', '.join('?' * len(STATUS_COLUMNS))})")
+UPSERT_LATEST = (f"INSERT INTO latest_status ({', '.join(STATUS_COLUMNS)}) "
+                 f"VALUES ({', '.join('?' * len(STATUS_COLUMNS))}) "
+                 f"ON CONFLICT(user_id) DO UPDATE SET "
+                 + ', '.join(f"{column} = excluded.{column}" for column in STATUS_COLUMNS[1:]))
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+_local = threading.local()
+_initialized = set()  # database paths whose schema this process has created
+_init_lock = threading.Lock()
+
+def init_db(conn, path):
+    """Switches the file to WAL and creates the schema, once per process and path."""
+    with _init_lock:
+        if path in _initialized:
+            return
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.executescript(SCHEMA)
+        _initialized.add(path)
+
+def connect_db(path=None):
+    """Opens a new connection with the pragmas applied (and the schema created on first use)."""
+    path = path or SQLITE_PATH
+    try:
+        conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        init_db(conn, path)
+        return conn
+    except sqlite3.Error as e:
+        print(f"❌ SQLite connection error ({path}): {e}")
+        return None
+
+def _conn():
+    """Connection of the current thread, opened once and reused."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None or getattr(_local, 'path', None) != SQLITE_PATH:
+        conn = connect_db(SQLITE_PATH)
+        if conn is None:
+            raise sqlite3.OperationalError(f"cannot open {SQLITE_PATH}")
+        _local.conn, _local.path = conn, SQLITE_PATH
+    return conn
+
+# --- Tracked users ---
+
+def load_vk_ids():
+    """Returns [(db_id, vk_id)] of tracked users."""
+    try:
+        return [tuple(row) for row in _conn().execute('SELECT id, vk_id FROM vk_users ORDER BY id')]
+    except sqlite3.Error as e:
+        print(f"❌ Error loading user list: {e}")
+        return []
+
+def add_vk_user(vk_id):
+    """Adds a user to the list. Returns False when the user is already tracked."""
+    try:
+        with _conn() as conn:
+            cursor = conn.execute('INSERT OR IGNORE INTO vk_users (vk_id) VALUES (?)', (vk_id,))
+        return cursor.rowcount == 1
+    except sqlite3.Error as e:
+        print(f"❌ Error adding user {vk_id}: {e}")
+        return False
+
+def delete_vk_user(user_db_id):
+    """Moves a user to the archive. Status history is kept for a later restore."""
+    try:
+        with _conn() as conn:
+            user = conn.execute('SELECT id, vk_id FROM vk_users WHERE id = ?', (user_db_id,)).fetchone()
+            if user is None:
+                return False
+            latest = conn.execute('SELECT name FROM latest_status WHERE user_id = ?', (user_db_id,)).fetchone()
+            conn.execute(
+                'INSERT INTO archived_users (original_id, original_vkid, original_name, archived_at) VALUES (?, ?, ?, ?)',
+                (user['id'], user['vk_id'], latest['name'] if latest else f"id{user['vk_id']}",
+                 datetime.now().isoformat(sep=' ', timespec='seconds'))
+            )
+            conn.execute('DELETE FROM vk_users WHERE id = ?', (user_db_id,))
+        return True
+    except sqlite3.Error as e:
+        print(f"❌ Error deleting user {user_db_id}: {e}")
+        return False
+
+def load_archived_users(limit=50):
+    """Returns the most recently archived users (dicts for templates/index.html)."""
+    try:
+        rows = _conn().execute(
+            'SELECT id, original_id, original_vkid, original_name, archived_at '
+            'FROM archived_users ORDER BY archived_at DESC, id DESC LIMIT ?', (limit,)
+        ).fetchall()
+        return [dict(row, archived_at=datetime.fromisoformat(row['archived_at'])) for row in rows]
+    except sqlite3.Error as e:
+        print(f"❌ Error loading archive: {e}")
+        return []
+
+def restore_user_from_archive(archived_id):
+    """Puts an archived user back to the list under the old id, so history stays attached.
+    Returns False and keeps the archive entry if the VK id was added to the list again meanwhile."""
+    try:
+        with _conn() as conn:
+            archived = conn.execute('SELECT * FROM archived_users WHERE id = ?', (archived_id,)).fetchone()
+            if archived is None:
+                return False
+            id_taken = conn.execute('SELECT 1 FROM vk_users WHERE id = ?', (archived['original_id'],)).fetchone()
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO vk_users (id, vk_id) VALUES (?, ?)',
+                (None if id_taken else archived['original_id'], archived['original_vkid'])
+            )
+            if cursor.rowcount != 1:
+                print(f"⚠️ VK ID {archived['original_vkid']} is already in the list, archive entry kept")
+                return False
+            conn.execute('DELETE FROM archived_users WHERE id = ?', (archived_id,))
+        return True
+    except sqlite3.Error as e:
+        print(f"❌ Error restoring archived user {archived_id}: {e}")
+        return False
+
+# --- Snapshots ---
+
+_photo_fetcher = None
+_photo_fetcher_lock = threading.Lock()
+
+def fetch_photos(urls):
+    """Avatar bytes by URL, through the on-disk photo cache (no download when unchanged).
+    One PhotoFetcher (and its thread pool) is shared by all saves."""
+    global _photo_fetcher
+    with _photo_fetcher_lock:
+        if _photo_fetcher is None:
+            from photo_fetcher import PhotoFetcher
+            _photo_fetcher = PhotoFetcher(summary_level=logging.DEBUG)
+    return _photo_fetcher.fetch(urls)
+
+def _store_photo(conn, content):
+    if not content:
+        return None
+    digest = hashlib.sha256(content).hexdigest()
+    conn.execute('INSERT OR IGNORE INTO photos (sha256, data) VALUES (?, ?)', (digest, content))
+    return conn.execute('SELECT id FROM photos WHERE sha256 = ?', (digest,)).fetchone()[0]
+
+def _status_row(db_id, full_user, photo_id, checked_at):
+    last_seen = full_user.get('last_seen') or {}
+    return (
+        db_id, checked_at, full_user.get('name'), int(bool(full_user.get('online'))),
+        last_seen.get('time'), last_seen.get('platform'), full_user.get('photo_200'), photo_id,
+        full_user.get('city'), full_user.get('bdate'), full_user.get('relation'),
+        full_user.get('friends_count'), full_user.get('followers_count'), full_user.get('subscriptions_count'),
+        full_user.get('groups_count'), full_user.get('wall_count'), full_user.get('photos_count'),
+        full_user.get('domain'),
+    )
+
+def save_users_bulk(records):
+    """Saves [(db_id, full_user)] in one transaction: photos deduplicated by hash,
+    snapshots inserted with executemany, latest_status upserted with them.
+    Raises sqlite3.Error when the transaction is rolled back, so the DB writer
+    counts the batch as failed."""
+    records = list(records)
+    if not records:
+        return True
+    photos = fetch_photos([full_user.get('photo_200') for _, full_user in records])
+    checked_at = int(time.time())
+    try:
+        with _conn() as conn:
+            photo_ids = {}
+            for url, content in photos.items():
+                photo_ids[url] = _store_photo(conn, content)
+            rows = [_status_row(db_id, full_user, photo_ids.get(full_user.get('photo_200')), checked_at)
+                    for db_id, full_user in records]
+            conn.executemany(INSERT_STATUS, rows)
+            conn.executemany(UPSERT_LATEST, rows)
+        return True
+    except sqlite3.Error as e:
+        print(f"❌ Error saving {len(records)} users: {e}")
+        raise
+
+def save_to_db(db_id, full_user):
+    """Saves one snapshot of a user. Returns False when it could not be saved."""
+    try:
+        return save_users_bulk([(db_id, full_user)])
+    except sqlite3.Error:
+        return False
+
+def load_users_with_latest_photos():
+    """Newest snapshot of every tracked user, with the avatar as base64.
+    Reads latest_status, so the cost does not grow with history."""
+    try:
+        rows = _conn().execute(
+            'SELECT v.id AS user_id, v.vk_id, l.*, p.data AS photo_data '
+            'FROM vk_users v '
+            'JOIN latest_status l ON l.user_id = v.id '
+            'LEFT JOIN photos p ON p.id = l.photo_id '
+            'ORDER BY v.id'
+        ).fetchall()
+    except sqlite3.Error as e:
+        print(f"❌ Error loading users: {e}")
+        return []
+
+    users = []
+    for row in rows:
+        user = dict(row)
+        photo_data = user.pop('photo_data')
+        user.pop('photo_id')
+        user['id'] = user['vk_id']
+        user['photo_base64'] = base64.b64encode(photo_data).decode('ascii') if photo_data else None
+        user['city'] = user['city'] or '—'
+        user['bdate'] = user['bdate'] or '—'
+        users.append(user)
+    return users
+
+def load_user_visits_for_chart(user_id):
+    """[{'timestamp': ISO time, 'online': 0/1, 'platform': ...}] of a user, oldest first."""
+    try:
+        rows = _conn().execute(
+            'SELECT checked_at, online, platform FROM user_status WHERE user_id = ? ORDER BY checked_at',
+            (user_id,)
+        ).fetchall()
+        return [{'timestamp': datetime.fromtimestamp(row['checked_at']).isoformat(timespec='seconds'),
+                 'online': row['online'], 'platform': row['platform']} for row in rows]
+    except sqlite3.Error as e:
+        print(f"❌ Error loading visits for user_id={user_id}: {e}")
+        return []
+
+# --- Statistics (unique users seen online) ---
+
+def load_activity_stats():
+    """[{'hour': 0..23, 'count': users}] of users seen online at each hour of the day."""
+    try:
+        rows = _conn().execute(
+            "SELECT CAST(strftime('%H', checked_at, 'unixepoch', 'localtime') AS INTEGER) AS hour, "
+            "COUNT(DISTINCT user_id) AS count FROM user_status WHERE online = 1 GROUP BY hour"
+        ).fetchall()
+    except sqlite3.Error as e:
+        print(f"❌ Error loading hourly statistics: {e}")
+        return []
+    counts = {row['hour']: row['count'] for row in rows}
+    return [{'hour': hour, 'count': counts.get(hour, 0)} for hour in range(24)]
+
+def load_weekly_activity_stats():
+    """[{'day_name': 'Monday', 'count': users}, ...] from Monday to Sunday."""
+    try:
+        rows = _conn().execute(
+            "SELECT CAST(strftime('%w', checked_at, 'unixepoch', 'localtime') AS INTEGER) AS weekday, "
+            "COUNT(DISTINCT user_id) AS count FROM user_status WHERE online = 1 GROUP BY weekday"
+        ).fetchall()
+    except sqlite3.Error as e:
+        print(f"❌ Error loading weekly statistics: {e}")
+        return []
+    counts = {(row['weekday'] - 1) % 7: row['count'] for row in rows}  # %w: 0 is Sunday
+    return [{'day_name': name, 'count': counts.get(day, 0)} for day, name in enumerate(DAY_NAMES)]
+
+def load_city_activity_stats(limit=20):
+    """[{'city_name': ..., 'count': users}] of cities with most users seen online."""
+    try:
+        rows = _conn().execute(
+            "SELECT city AS city_name, COUNT(DISTINCT user_id) AS count FROM user_status "
+            "WHERE online = 1 AND city IS NOT NULL AND city != '' "
+            "GROUP BY city ORDER BY count DESC, city LIMIT ?", (limit,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+    except sqlite3.Error as e:
+        print(f"❌ Error loading city statistics: {e}")
+        return []
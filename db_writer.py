@@ -0,0 +1,106 @@
+# db_writer.py
+import queue
+import threading
+import time
+from config import DB_WRITE_BATCH_SIZE
+from metrics import instrument
+
+_STOP = object()
+_storage = None
+
+def storage_functions():
+    """(save_to_db, save_users_bulk or None) of the DB_BACKEND storage, instrumented.
+    Imported on first save, so 'memory' mode, the benchmark and the offline tests
+    can use the collection code without a database module."""
+    global _storage
+    if _storage is None:
+        from storage import save_to_db
+        try:
+            # Bulk API: the whole batch in one transaction (executemany), photos upserted with it
+            from storage import save_users_bulk
+        except ImportError:
+            save_users_bulk = None
+        save_to_db = instrument(save_to_db, 'db_call_seconds', function='save_to_db')
+        if save_users_bulk is not None:
+            save_users_bulk = instrument(save_users_bulk, 'db_call_seconds', function='save_users_bulk')
+        _storage = save_to_db, save_users_bulk
+    return _storage
+
+def save_records(records):
+    """Saves a batch of (db_id, full_user) records.
+    With database.save_users_bulk the batch costs a few round trips and one commit,
+    otherwise every record goes through save_to_db."""
+    save_to_db, save_users_bulk = storage_functions()
+    if save_users_bulk is not None:
+        save_users_bulk(records)
+        return
+    for db_id, full_user in records:
+        save_to_db(db_id, full_user)
+
+class DBWriter:
+    """Background writer stage.
+    Takes (db_id, full_user) records from a queue and persists them in batches
+    in its own thread, so DB writes overlap with fetching from VK.
+    A batch is written when it has batch_size records, when max_wait seconds
+    have passed since its first record, or on close(); a users.get chunk
+    (95 users) therefore goes out as one bulk call even if the queue runs
+    empty for a moment while the chunk is being built."""
+
+    def __init__(self, batch_size=DB_WRITE_BATCH_SIZE, max_pending=1000, save_batch=save_records, max_wait=1.0):
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.save_batch = save_batch
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+        self.saved = 0
+        self.failed = 0
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def put(self, db_id, full_user):
+        """Queues a record; blocks only if max_pending records are waiting."""
+        self.queue.put((db_id, full_user))
+
+    def close(self):
+        """Flushes everything queued and stops the thread."""
+        self.queue.put(_STOP)
+        self.thread.join()
+        print(f"💾 DB writer: saved {self.saved} users, failed {self.failed}")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        try:
+            self.save_batch(batch)
+            self.saved += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"❌ DB writer: failed to save {len(batch)} users: {e}")
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            item = self.queue.get()
+            deadline = time.monotonic() + self.max_wait
+            # Fill the batch up to batch_size, waiting at most max_wait for the rest
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            self._flush(batch)
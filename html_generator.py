@@ -2,6 +2,8 @@
 import os
 from datetime import datetime
 from config import OUTPUT_HTML
+from photo_cache import get_photo_cache
+from metrics import metrics
 
 # --- Months in words ---
 MONTHS = {
@@ -73,7 +75,44 @@ RELATION_MAP = {
     7: "in love", 8: "in a civil union", 9: "not specified"
 }
 
+# --- MIME type of a base64 photo (thumbnails may be WebP or PNG) ---
+def photo_mime(photo_base64):
+    if photo_base64.startswith('UklGR'):
+        return 'image/webp'
+    if photo_base64.startswith('iVBOR'):
+        return 'image/png'
+    return 'image/jpeg'
+
+# --- Photo from the photo cache (path relative to the HTML page) ---
+def cached_photo_src(photo_url):
+    if not photo_url:
+        return None
+    path = get_photo_cache().cached_path(photo_url)
+    if not path:
+        return None
+    html_dir = os.path.dirname(os.path.abspath(OUTPUT_HTML))
+    return os.path.relpath(os.path.abspath(path), html_dir).replace(os.sep, '/')
+
+# --- Users collected in 'memory' mode (vk_api.build_full_user) in the shape of DB rows ---
+def page_users(users):
+    """Returns users the way load_users_with_latest_photos gives them to generate_html:
+    last_seen as a timestamp, user_id set (VK id, there is no DB id in 'memory' mode)
+    and '—' for unknown city and birth date. DB rows pass through unchanged."""
+    result = []
+    for user in users:
+        if not user:
+            continue
+        user = dict(user)
+        if isinstance(user.get('last_seen'), dict):
+            user['last_seen'] = user['last_seen'].get('time')
+        user.setdefault('user_id', user.get('id'))
+        user['city'] = user.get('city') or '—'
+        user['bdate'] = user.get('bdate') or '—'
+        result.append(user)
+    return result
+
 # --- Generate HTML ---
+@metrics.timed('html_render_seconds', function='generate_html')
 def generate_html(users_data):
     current_time = datetime.now().strftime("%d.%m.%Y %H:%M:%S")
 
@@ -156,8 +195,10 @@ def generate_html(users_data):
 
         # --- Generate photo ---
         src = PLACEHOLDER
-        if user['photo_base64']:
-            src = f"data:image/jpeg;base64,{user['photo_base64']}"
+        if user.get('photo_base64'):
+            src = f"data:{photo_mime(user['photo_base64'])};base64,{user['photo_base64']}"
+        elif cached_photo_src(user.get('photo_200')):
+            src = cached_photo_src(user['photo_200'])
 
         card_class = 'user-card'
         if is_birthday_soon(user['bdate']):
@@ -259,6 +300,7 @@ def generate_html(users_data):
     print(f"📄 HTML page saved: {os.path.abspath(OUTPUT_HTML)}")
 
 # --- Generate statistics HTML ---
+@metrics.timed('html_render_seconds', function='generate_static_statistics_html')
 def generate_static_statistics_html(hourly_stats_data, weekly_stats_data, city_stats_data):
     """Generates HTML statistics page and saves it as a file."""
     from config import STATISTICS_HTML # Make sure STATISTICS_HTML is defined in config.py
@@ -407,6 +449,7 @@ def generate_static_statistics_html(hourly_stats_data, weekly_stats_data, city_s
     print(f"📊 Static statistics page saved: {os.path.abspath(STATISTICS_HTML)}")
 
 # --- Generate calendar (moved from main.py) ---
+@metrics.timed('html_render_seconds', function='generate_birthday_calendar')
 def generate_birthday_calendar(users_data):
     from config import CALENDAR_HTML
     calendar_filename = CALENDAR_HTML
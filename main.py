@@ -2,12 +2,83 @@
 import argparse
 import sys
 import os
-from config import VK_ACCESS_TOKEN, OUTPUT_HTML, APP_MODE
-from database import load_vk_ids, load_users_with_latest_photos, load_city_activity_stats
-from html_generator import generate_html, generate_birthday_calendar, generate_static_statistics_html
-from utils import open_in_browser
+import time
+from config import (
+    VK_ACCESS_TOKEN, OUTPUT_HTML, APP_MODE, ONLINE_POLL_INTERVAL, COUNTERS_POLL_INTERVAL,
+    COLLECTOR_INTERVAL, VK_WORKERS
+)
+from storage import load_vk_ids, load_users_with_latest_photos, load_city_activity_stats
+from html_generator import generate_html, generate_birthday_calendar, generate_static_statistics_html, page_users
+from utils import open_in_browser, setup_logging
+from counters_cache import CountersCache
+from metrics import metrics, instrument
 
-def run_full_monitoring():
+load_vk_ids = instrument(load_vk_ids, 'db_call_seconds', function='load_vk_ids')
+load_users_with_latest_photos = instrument(
+    load_users_with_latest_photos, 'db_call_seconds', function='load_users_with_latest_photos'
+)
+load_city_activity_stats = instrument(load_city_activity_stats, 'db_call_seconds', function='load_city_activity_stats')
+
+@metrics.timed('stage_seconds', stage='prefetch_photos')
+def prefetch_photos(users):
+    """Downloads avatars in parallel into the photo cache, so HTML can link them."""
+    from photo_fetcher import PhotoFetcher
+    PhotoFetcher().fetch([user.get('photo_200') for user in users])
+
+@metrics.timed('stage_seconds', stage='collect')
+def collect_users(vk_id_pairs, counters_cache, use_async=False, refresh_counters=True, progress=None,
+                  workers=VK_WORKERS):
+    """Runs one collection for the pairs.
+    Returns (users_data_from_api, collected); users_data_from_api is None in 'db' mode,
+    where users are streamed into the DB instead of being kept in memory.
+    progress(done) is called after every user (once at the end for the async engine
+    and for worker processes). With workers > 1 the pairs are collected in shards
+    by separate processes (see sharded_collection)."""
+    from vk_api import CHUNK_SIZE
+    if workers > 1 and len(vk_id_pairs) > CHUNK_SIZE:
+        from sharded_collection import collect_sharded
+        users_data_from_api, collected = collect_sharded(
+            vk_id_pairs, counters_cache, workers, use_async, refresh_counters
+        )
+        if progress:
+            progress(collected)
+        return users_data_from_api, collected
+    if use_async:
+        from vk_api_async import get_users_info_concurrent
+        print("⚡ Using async collection engine.")
+        users_data_from_api = get_users_info_concurrent(
+            vk_id_pairs, counters_cache=counters_cache, refresh_counters=refresh_counters
+        )
+        if progress:
+            progress(len(users_data_from_api))
+        return users_data_from_api, len(users_data_from_api)
+    if APP_MODE == 'db':
+        from vk_api import save_users_info
+        return None, save_users_info(
+            vk_id_pairs, counters_cache=counters_cache, refresh_counters=refresh_counters, progress=progress
+        )
+    from vk_api import get_users_info
+    users_data_from_api = get_users_info(
+        vk_id_pairs, counters_cache=counters_cache, refresh_counters=refresh_counters, progress=progress
+    )
+    return users_data_from_api, len(users_data_from_api)
+
+@metrics.timed('stage_seconds', stage='render')
+def render_pages(users_data_from_api):
+    """Generates monitoring page and birthday calendar without opening the browser.
+    Returns the number of users on the page."""
+    if APP_MODE == 'memory':
+        latest_users = page_users(users_data_from_api or [])
+        if latest_users:
+            prefetch_photos(latest_users)
+    else:
+        latest_users = load_users_with_latest_photos()
+    if latest_users:
+        generate_html(latest_users)
+        generate_birthday_calendar(latest_users)
+    return len(latest_users or [])
+
+def run_full_monitoring(use_async=False, workers=VK_WORKERS):
     print("🚀 Starting to check VKontakte users...\n")
 
     if not VK_ACCESS_TOKEN or VK_ACCESS_TOKEN.strip() == '' or VK_ACCESS_TOKEN == 'token':
@@ -24,21 +95,26 @@ def run_full_monitoring():
 
     print(f"✅ Loaded {len(vk_id_pairs)} users from DB.")
 
-    from vk_api import get_users_info
-    users_data_from_api = get_users_info(vk_id_pairs)
+    counters_cache = CountersCache.load()
+    users_data_from_api, collected = collect_users(vk_id_pairs, counters_cache, use_async, workers=workers)
+    counters_cache.save()
+    print(f"✅ Collected {collected} users.")
 
     if APP_MODE == 'memory':
         if not users_data_from_api:
             print("❌ No data for mode 'memory'.")
         else:
-            print(f"\n🎨 Generate HTML for {len(users_data_from_api)} users (mode 'memory')...")
-            generate_html(users_data_from_api)
-            generate_birthday_calendar(users_data_from_api)
+            latest_users = page_users(users_data_from_api)
+            prefetch_photos(latest_users)
+            print(f"\n🎨 Generate HTML for {len(latest_users)} users (mode 'memory')...")
+            generate_html(latest_users)
+            generate_birthday_calendar(latest_users)
 
             print("\n🌐 open browser...")
             open_in_browser()
 
             print(f"\n✅ Ready! Done in mode 'memory'.")
+        print(metrics.report())
         return
 
     latest_users = load_users_with_latest_photos()
@@ -54,6 +130,7 @@ def run_full_monitoring():
         open_in_browser()
 
         print(f"\n✅ Ready! Check done.")
+    print(metrics.report())
 
 def generate_html_only():
     """Generate HTML page only from the latest DB data."""
@@ -74,25 +151,170 @@ def generate_html_only():
 
         print(f"\n✅ HTML page updated!")
 
+def run_scheduler(online_interval=ONLINE_POLL_INTERVAL, counters_interval=COUNTERS_POLL_INTERVAL,
+                  workers=VK_WORKERS):
+    """Tiered polling: cheap users.get sweeps (online, last_seen) every online_interval,
+    per-user counters refreshed every counters_interval and carried forward in between."""
+    print("🚀 Starting scheduled monitoring of VKontakte users...\n")
+
+    if not VK_ACCESS_TOKEN or VK_ACCESS_TOKEN.strip() == '' or VK_ACCESS_TOKEN == 'token':
+        print("❌ Error: VK_ACCESS_TOKEN is not set in .env file")
+        sys.exit(1)
+
+    print(f"🔧 Working mode: {APP_MODE.upper()}")
+    print(f"⏱️ Online sweep every {online_interval}s, counters every {counters_interval}s")
+
+    counters_cache = CountersCache.load()
+    next_counters_refresh = 0
+
+    try:
+        while True:
+            started = time.monotonic()
+            refresh_counters = started >= next_counters_refresh
+            if refresh_counters:
+                next_counters_refresh = started + counters_interval
+                print("\n📊 Sweep with counters refresh...")
+            else:
+                print("\n🟢 Online status sweep...")
+
+            vk_id_pairs = load_vk_ids()
+            if not vk_id_pairs:
+                print("❌ User list is empty.")
+                users_data_from_api, collected = [], 0
+            else:
+                users_data_from_api, collected = collect_users(
+                    vk_id_pairs, counters_cache, refresh_counters=refresh_counters, workers=workers
+                )
+                counters_cache.save()
+
+            render_pages(users_data_from_api)
+
+            elapsed = time.monotonic() - started
+            print(f"✅ Sweep done in {elapsed:.1f}s for {collected} users.")
+            time.sleep(max(0, online_interval - elapsed))
+    except KeyboardInterrupt:
+        print("\n🛑 Scheduler stopped.")
+        print(metrics.report())
+
+def run_daemon(interval=COLLECTOR_INTERVAL, use_async=False, workers=VK_WORKERS):
+    """Long-running collector: keeps HTTP connections and caches warm,
+    collects on schedule and on requests from the web app (see collector_daemon)."""
+    from collector_daemon import CollectorDaemon
+
+    print("🚀 Starting collector daemon...\n")
+    if not VK_ACCESS_TOKEN or VK_ACCESS_TOKEN.strip() == '' or VK_ACCESS_TOKEN == 'token':
+        print("❌ Error: VK_ACCESS_TOKEN is not set in .env file")
+        sys.exit(1)
+    print(f"🔧 Working mode: {APP_MODE.upper()}")
+
+    counters_cache = CountersCache.load()
+
+    def collect_once():
+        vk_id_pairs = load_vk_ids()
+        if not vk_id_pairs:
+            print("❌ User list is empty.")
+            return 0
+        users_data_from_api, collected = collect_users(vk_id_pairs, counters_cache, use_async, workers=workers)
+        counters_cache.save()
+        render_pages(users_data_from_api)
+        return collected
+
+    try:
+        daemon = CollectorDaemon(collect_once, interval)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    daemon.run()
+    print(metrics.report())
+
 def main():
     parser = argparse.ArgumentParser(
         description="VKontakte users monitoring",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="Examples:\n"
-               "  python main.py
+               "  python main.py           # Full check (VK API + HTML)\n"
                "  python main.py --view    # HTML generation only from DB\n"
+               "  python main.py --async   # Full check with concurrent requests\n"
+               "  python main.py --schedule  # Poll online status constantly, counters less often\n"
+               "  python main.py --daemon  # Collector service for the web app\n"
+               "  python main.py --workers 4  # Collect in 4 processes (give them several tokens)\n"
+               "  python main.py --profile  # Full check under the profiler (profile.pstats, profile.collapsed)\n"
     )
     parser.add_argument(
         '--view', '-v',
         action='store_true',
         help='Generate HTML page from the latest DB data without connecting to VK API'
     )
+    parser.add_argument(
+        '--async', '-a',
+        dest='use_async',
+        action='store_true',
+        help='Collect data with the asyncio engine (concurrent requests under a rate limiter)'
+    )
+    parser.add_argument(
+        '--schedule', '-s',
+        action='store_true',
+        help='Run tiered polling: fast online sweeps and slower counter refreshes'
+    )
+    parser.add_argument(
+        '--online-interval',
+        type=int,
+        default=ONLINE_POLL_INTERVAL,
+        help='Seconds between online status sweeps in --schedule mode'
+    )
+    parser.add_argument(
+        '--counters-interval',
+        type=int,
+        default=COUNTERS_POLL_INTERVAL,
+        help='Seconds between counter refreshes in --schedule mode'
+    )
+    parser.add_argument(
+        '--daemon', '-d',
+        action='store_true',
+        help='Run as a long-running collector service triggered by the web app'
+    )
+    parser.add_argument(
+        '--interval',
+        type=int,
+        default=COLLECTOR_INTERVAL,
+        help='Seconds between scheduled collections in --daemon mode (0 - only on request)'
+    )
+    parser.add_argument(
+        '--workers', '-w',
+        type=int,
+        default=VK_WORKERS,
+        help='Worker processes collecting shards of the user list (tokens are split between them)'
+    )
+    parser.add_argument(
+        '--profile', '-p',
+        action='store_true',
+        help='Run under cProfile and a stack sampler, print hot functions by phase'
+    )
+    parser.add_argument(
+        '--profile-output',
+        default='profile',
+        help='Path prefix for the .pstats and .collapsed files written by --profile'
+    )
 
     args = parser.parse_args()
+    setup_logging()
 
     if args.view:
-        generate_html_only()
+        action, kwargs = generate_html_only, {}
+    elif args.schedule:
+        action, kwargs = run_scheduler, dict(
+            online_interval=args.online_interval, counters_interval=args.counters_interval, workers=args.workers
+        )
+    elif args.daemon:
+        action, kwargs = run_daemon, dict(interval=args.interval, use_async=args.use_async, workers=args.workers)
+    else:
+        action, kwargs = run_full_monitoring, dict(use_async=args.use_async, workers=args.workers)
+
+    if args.profile:
+        from profiling import profile_call
+        profile_call(action, output=args.profile_output, **kwargs)
     else:
-        run_full_monitoring()
+        action(**kwargs)
 
 if __name__ == "__main__":
     main()
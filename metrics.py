@@ -0,0 +1,213 @@
+# metrics.py
+"""In-process metrics: latency histograms and call counts.
+
+    vk_api_request_seconds{method, result}  -- every HTTP request to VK (result: ok, error_<code>, timeout)
+    db_call_seconds{function}               -- database functions
+    html_render_seconds{function}           -- HTML generators
+    stage_seconds{stage}                    -- stages of a monitoring run
+
+    with metrics.timer('stage_seconds', stage='collect'):
+        ...
+
+    print(metrics.report())      # summary at the end of a run
+    metrics.prometheus()         # text for the /metrics endpoint
+"""
+import copy
+import functools
+import threading
+import time
+
+# Upper bounds of histogram buckets, seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+HELP = {
+    'vk_api_request_seconds': 'VK API HTTP requests by method and result',
+    'db_call_seconds': 'Database function calls',
+    'html_render_seconds': 'HTML page generation',
+    'stage_seconds': 'Stages of a monitoring run',
+    'users_collected_total': 'Users collected from VK',
+    'vk_execute_errors_total': 'Errors of API calls inside execute by method and error code',
+}
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (like histogram_quantile)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+class Metrics:
+    """Thread-safe registry of histograms and counters keyed by (name, labels)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def observe(self, name, seconds, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def timer(self, name, **labels):
+        return _Timer(self, name, labels)
+
+    def timed(self, name, **labels):
+        """Decorator version of timer()."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """Picklable copy of everything recorded, see merge()."""
+        with self.lock:
+            return copy.deepcopy(self.histograms), dict(self.counters)
+
+    def merge(self, snapshot):
+        """Adds a snapshot from another process (e.g. a --workers process)."""
+        histograms, counters = snapshot
+        with self.lock:
+            for key, other in histograms.items():
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    self.histograms[key] = copy.deepcopy(other)
+                    continue
+                histogram.counts = [a + b for a, b in zip(histogram.counts, other.counts)]
+                histogram.count += other.count
+                histogram.sum += other.sum
+                histogram.max = max(histogram.max, other.max)
+            for key, value in counters.items():
+                self.counters[key] = self.counters.get(key, 0) + value
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def report(self):
+        """Human-readable summary of everything recorded so far."""
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+        if not histograms and not counters:
+            return "📈 No metrics recorded."
+
+        lines = ["📈 Metrics summary:",
+                 f"   {'metric':<52} {'count':>7} {'total s':>9} {'avg ms':>8} {'p95 ms':>8} {'max ms':>8}"]
+        for (name, labels), histogram in histograms:
+            title = name + _format_labels(labels)
+            lines.append(f"   {title:<52} {histogram.count:>7} {histogram.sum:>9.2f} "
+                         f"{histogram.sum / histogram.count * 1000:>8.1f} {histogram.quantile(0.95) * 1000:>8.1f} "
+                         f"{histogram.max * 1000:>8.1f}")
+        for (name, labels), value in counters:
+            lines.append(f"   {name + _format_labels(labels):<52} {value:>7}")
+        return '\n'.join(lines)
+
+    def prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+
+        lines = []
+        described = set()
+
+        def describe(name, kind):
+            if name not in described:
+                described.add(name)
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), histogram in histograms:
+            describe(name, 'histogram')
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        for (name, labels), value in counters:
+            describe(name, 'counter')
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        return '\n'.join(lines) + '\n'
+
+class _Timer:
+    """Observes the duration of a `with` block. The `result` label (if given)
+    can be changed inside the block, e.g. to the VK error code."""
+
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and 'result' in self.labels and self.labels['result'] == 'ok':
+            self.labels['result'] = 'exception'
+        self.metrics.observe(self.name, time.perf_counter() - self.started, **self.labels)
+        return False
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+def vk_result(data):
+    """Result label of a VK API answer: ok or error_<code>."""
+    if isinstance(data, dict) and 'error' in data:
+        return f"error_{data['error'].get('error_code', 'unknown')}"
+    return 'ok'
+
+def instrument(func, name, **labels):
+    """Wraps a function imported from another module (e.g. database) with a timer."""
+    return metrics.timed(name, **labels)(func)
+
+metrics = Metrics()
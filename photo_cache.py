@@ -0,0 +1,273 @@
+# photo_cache.py
+import atexit
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from config import PHOTO_CACHE_DIR, PHOTO_CACHE_MAX_MB, PHOTO_CACHE_REVALIDATE, PHOTO_THUMBNAILS
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, the index is still merged on save
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+BLOB_GRACE = 300  # seconds a new blob is kept even if no saved index references it yet
+
+EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+}
+
+class PhotoCache:
+    """On-disk avatar cache keyed by photo URL.
+    Blobs are named by the SHA-256 of their content, so identical images are stored once.
+    Entries older than revalidate_after are checked with ETag / If-Modified-Since,
+    and least recently used entries are evicted when the cache grows over max_bytes.
+    processor(content, content_type) -> (content, content_type) is applied to
+    downloaded photos before they are stored (see photo_processing.make_thumbnail).
+
+    Several processes may share the directory (collector daemon, web app,
+    --workers processes). save() merges with the index on disk under a file
+    lock instead of overwriting it, and blobs are unlinked only at save time,
+    when the merged index no longer references them."""
+
+    def __init__(self, directory=PHOTO_CACHE_DIR, max_bytes=PHOTO_CACHE_MAX_MB * 1024 * 1024,
+                 revalidate_after=PHOTO_CACHE_REVALIDATE, processor=None):
+        self.directory = directory
+        self.processor = processor
+        self.blobs_dir = os.path.join(directory, 'blobs')
+        self.index_path = os.path.join(directory, 'index.json')
+        self.lock_path = os.path.join(directory, 'index.lock')
+        self.max_bytes = max_bytes
+        self.revalidate_after = revalidate_after
+        self.lock = threading.RLock()
+        self.dirty = False
+        # url -> {'hash', 'ext', 'size', 'etag', 'last_modified', 'checked', 'used'}
+        self.index = {}
+        self.removed = {}  # url -> time it was evicted, until the next save
+        self.orphans = {}  # blob name -> entry, blobs to unlink at the next save
+        self.index = self._read_index()
+
+    def _read_index(self):
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"⚠️ Cannot read photo cache index: {e}")
+            return {}
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock on the index for all processes using the directory."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.lock_path, 'a') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _merge(self, disk_index):
+        """Index on disk plus our changes; for a URL known to both the more recently used entry wins."""
+        merged = dict(disk_index)
+        for url, removed_at in self.removed.items():
+            entry = merged.get(url)
+            if entry and entry['used'] <= removed_at:
+                del merged[url]
+        for url, entry in self.index.items():
+            other = merged.get(url)
+            if other is None or entry['used'] >= other['used']:
+                merged[url] = entry
+        return merged
+
+    def save(self):
+        """Merges the index into the one on disk, writes it and unlinks orphaned blobs."""
+        with self.lock:
+            if not self.dirty:
+                return
+            try:
+                with self._file_lock():
+                    merged = self._merge(self._read_index())
+                    self._evict(merged)
+                    tmp_path = self.index_path + '.tmp'
+                    with open(tmp_path, 'w', encoding='utf-8') as f:
+                        json.dump(merged, f)
+                    os.replace(tmp_path, self.index_path)
+                    self.index = merged
+                    self.removed.clear()
+                    self._remove_orphans()
+                self.dirty = False
+            except Exception as e:
+                print(f"⚠️ Cannot save photo cache index: {e}")
+
+    def _blob_path(self, entry):
+        return os.path.join(self.blobs_dir, entry['hash'] + entry['ext'])
+
+    def cached_path(self, url):
+        """Path of the cached blob for the URL, or None if it is not cached."""
+        with self.lock:
+            entry = self.index.get(url)
+            if entry and os.path.exists(self._blob_path(entry)):
+                return self._blob_path(entry)
+        return None
+
+    def read(self, url):
+        """Cached photo bytes for the URL, or None."""
+        path = self.cached_path(url)
+        if not path:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _touch(self, url, checked=False):
+        with self.lock:
+            entry = self.index.get(url)
+            if entry:
+                entry['used'] = time.time()
+                if checked:
+                    entry['checked'] = entry['used']
+                self.dirty = True
+
+    def get(self, url, client):
+        """Returns photo bytes for the URL (or None), downloading only when needed.
+        client is a vk_api.VKClient (anything with get(url, headers=...))."""
+        with self.lock:
+            entry = dict(self.index.get(url) or {})
+        content = self.read(url) if entry else None
+
+        if content is not None and time.time() - entry.get('checked', 0) < self.revalidate_after:
+            self._touch(url)
+            return content
+
+        headers = {}
+        if content is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        try:
+            logger.debug(f"📥 Downloading photo: {url}")
+            response = client.get(url, headers=headers)
+        except Exception as e:
+            logger.warning(f"   ⚠️ Photo download exception: {e}")
+            return content
+
+        if response.status_code == 304 and content is not None:
+            logger.debug("   → Not modified, cached photo used")
+            self._touch(url, checked=True)
+            return content
+
+        if response.status_code != 200:
+            logger.warning(f"   ⚠️ Photo download error: {response.status_code}")
+            return content
+
+        content_type = response.headers.get('content-type', '')
+        if 'image' not in content_type:
+            logger.warning(f"   ⚠️ URL is not an image: {content_type}")
+            return None
+
+        logger.debug(f"   → Photo downloaded ({len(response.content)} bytes)")
+        content = response.content
+        if self.processor:
+            content, content_type = self.processor(content, content_type)
+        self.store(url, content, content_type,
+                   response.headers.get('etag'), response.headers.get('last-modified'))
+        return content
+
+    def store(self, url, content, content_type='image/jpeg', etag=None, last_modified=None):
+        """Puts photo bytes into the cache; identical content shares one blob."""
+        digest = hashlib.sha256(content).hexdigest()
+        ext = EXTENSIONS.get(content_type.split(';')[0].strip(), '.jpg')
+        now = time.time()
+        entry = {
+            'hash': digest, 'ext': ext, 'size': len(content),
+            'etag': etag, 'last_modified': last_modified, 'checked': now, 'used': now
+        }
+        with self.lock:
+            path = self._blob_path(entry)
+            if os.path.exists(path):
+                os.utime(path)  # keeps it out of another process's orphan cleanup until we save
+            else:
+                os.makedirs(self.blobs_dir, exist_ok=True)
+                tmp_path = path + '.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(content)
+                os.replace(tmp_path, path)
+            old_entry = self.index.get(url)
+            self.index[url] = entry
+            self.dirty = True
+            if old_entry and old_entry['hash'] != digest:
+                self._orphan_if_unreferenced(old_entry, self.index)
+            self._evict(self.index)
+        return digest
+
+    def _orphan_if_unreferenced(self, entry, index):
+        if not any(other['hash'] == entry['hash'] for other in index.values()):
+            self.orphans[entry['hash'] + entry['ext']] = entry
+            return True
+        return False
+
+    def _remove_orphans(self):
+        """Unlinks orphaned blobs that the merged index does not reference.
+        Blobs written in the last BLOB_GRACE seconds are kept: another process
+        may have stored them and not saved its index yet."""
+        referenced = {entry['hash'] for entry in self.index.values()}
+        now = time.time()
+        for name, entry in list(self.orphans.items()):
+            path = self._blob_path(entry)
+            if entry['hash'] not in referenced:
+                try:
+                    if now - os.path.getmtime(path) < BLOB_GRACE:
+                        continue
+                    os.remove(path)
+                except OSError:
+                    pass
+            del self.orphans[name]
+
+    def total_bytes(self):
+        with self.lock:
+            return sum({entry['hash']: entry['size'] for entry in self.index.values()}.values())
+
+    def _evict(self, index):
+        """Drops least recently used URLs until the blobs fit into max_bytes."""
+        total = sum({entry['hash']: entry['size'] for entry in index.values()}.values())
+        if total <= self.max_bytes:
+            return
+        now = time.time()
+        for url, entry in sorted(index.items(), key=lambda item: item[1]['used']):
+            if total <= self.max_bytes:
+                break
+            del index[url]
+            self.removed[url] = now
+            if self._orphan_if_unreferenced(entry, index):
+                total -= entry['size']
+
+_photo_cache = None
+
+def get_photo_cache():
+    """Returns shared PhotoCache instance; its index is saved after every
+    PhotoFetcher batch and on exit."""
+    global _photo_cache
+    if _photo_cache is None:
+        processor = None
+        if PHOTO_THUMBNAILS:
+            from photo_processing import make_thumbnail
+            processor = make_thumbnail
+        _photo_cache = PhotoCache(processor=processor)
+        atexit.register(_photo_cache.save)
+    return _photo_cache
@@ -0,0 +1,91 @@
+# photo_fetcher.py
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+from config import PHOTO_WORKERS, PHOTO_PER_HOST
+from photo_cache import get_photo_cache
+from vk_api import download_photo, get_client
+
+logger = logging.getLogger(__name__)
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+class PhotoFetcher:
+    """Downloads many photos concurrently through download_photo.
+    At most max_workers downloads run at once and at most per_host of them
+    against one host. The thread pool is reused by every fetch() of the instance.
+    Timing of the last batch is kept in last_stats and logged at summary_level."""
+
+    def __init__(self, client=None, max_workers=PHOTO_WORKERS, per_host=PHOTO_PER_HOST, use_cache=True,
+                 summary_level=logging.INFO):
+        self.client = client or get_client()
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.use_cache = use_cache
+        self.summary_level = summary_level
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='photo')
+        self.host_limits = {}
+        self.lock = threading.Lock()
+        self.last_stats = {}
+
+    def _host_limit(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.host_limits:
+                self.host_limits[host] = threading.BoundedSemaphore(self.per_host)
+            return self.host_limits[host]
+
+    def _fetch_one(self, url):
+        with self._host_limit(url):
+            started = time.monotonic()
+            content = download_photo(url, self.client, self.use_cache)
+            return content, time.monotonic() - started
+
+    def fetch(self, urls, batch_timeout=None):
+        """Downloads photos for the URLs (duplicates are downloaded once).
+        Returns {url: bytes or None}; photos not finished within batch_timeout are None."""
+        unique_urls = list(dict.fromkeys(url for url in urls if url))
+        photos = {url: None for url in unique_urls}
+        latencies = []
+        started = time.monotonic()
+
+        futures = {self.executor.submit(self._fetch_one, url): url for url in unique_urls}
+        done, not_done = wait(futures, timeout=batch_timeout)
+        for future in not_done:
+            future.cancel()  # downloads already running finish in the background
+        if self.use_cache:
+            get_photo_cache().save()  # other processes share the cache directory
+
+        for future in done:
+            url = futures[future]
+            try:
+                photos[url], latency = future.result()
+                latencies.append(latency)
+            except Exception as e:
+                logger.warning(f"   ⚠️ Photo download exception: {url}: {e}")
+
+        elapsed = time.monotonic() - started
+        latencies.sort()
+        downloaded = sum(1 for content in photos.values() if content is not None)
+        self.last_stats = {
+            'urls': len(unique_urls),
+            'downloaded': downloaded,
+            'failed': len(unique_urls) - downloaded - len(not_done),
+            'timed_out': len(not_done),
+            'bytes': sum(len(content) for content in photos.values() if content),
+            'seconds': elapsed,
+            'p50': percentile(latencies, 0.5),
+            'p99': percentile(latencies, 0.99),
+            'max': latencies[-1] if latencies else 0.0,
+        }
+        logger.log(self.summary_level,
+                   f"📸 Photos: {downloaded}/{len(unique_urls)} in {elapsed:.2f}s "
+                   f"(p50 {self.last_stats['p50']:.2f}s, p99 {self.last_stats['p99']:.2f}s, "
+                   f"failed {self.last_stats['failed']}, timed out {len(not_done)})")
+        return photos
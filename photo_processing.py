@@ -0,0 +1,43 @@
+# photo_processing.py
+import io
+import logging
+from config import PHOTO_THUMB_SIZE, PHOTO_THUMB_FORMAT, PHOTO_THUMB_QUALITY
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {'WEBP': 'image/webp', 'JPEG': 'image/jpeg'}
+
+def make_thumbnail(content, content_type='image/jpeg', size=PHOTO_THUMB_SIZE,
+                   fmt=PHOTO_THUMB_FORMAT, quality=PHOTO_THUMB_QUALITY):
+    """Crops the photo to a square, downscales it to size x size and re-encodes it
+    (WebP, or optimized progressive JPEG).
+    Returns (bytes, content_type); the original is returned if Pillow is not installed,
+    the image cannot be processed or the result is not smaller."""
+    if Image is None or not content:
+        return content, content_type
+
+    try:
+        with Image.open(io.BytesIO(content)) as image:
+            thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+            output = io.BytesIO()
+            if fmt == 'WEBP':
+                if thumbnail.mode not in ('RGB', 'RGBA'):
+                    thumbnail = thumbnail.convert('RGBA' if 'A' in thumbnail.getbands() else 'RGB')
+                thumbnail.save(output, 'WEBP', quality=quality, method=6)
+            else:
+                fmt = 'JPEG'
+                thumbnail.convert('RGB').save(output, 'JPEG', quality=quality, optimize=True, progressive=True)
+    except Exception as e:
+        logger.warning(f"   ⚠️ Cannot make thumbnail: {e}")
+        return content, content_type
+
+    result = output.getvalue()
+    if len(result) >= len(content):
+        return content, content_type
+    logger.debug(f"   → Photo re-encoded: {len(content)} → {len(result)} bytes ({fmt} {size}px)")
+    return result, CONTENT_TYPES[fmt]
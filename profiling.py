@@ -0,0 +1,145 @@
+# profiling.py
+"""Profiling for `main.py --profile`.
+
+Runs a function under cProfile and, at the same time, a stack sampler that
+looks at all threads every few milliseconds. Writes:
+
+    <output>.pstats     -- cProfile dump (python -m pstats, snakeviz, ...)
+    <output>.collapsed  -- sampled stacks "thread;module:func;... count",
+                           input for flamegraph.pl / speedscope / inferno
+
+and prints the hottest functions overall and split by phase
+(collection, db, html, calendar). Sampling is wall-clock: time spent waiting
+for VK or the DB shows up too, idle pool threads are skipped.
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+SAMPLE_INTERVAL = 0.005  # seconds
+TOP_FUNCTIONS = 15
+TOP_PER_PHASE = 5
+
+# Checked in this order; a sample belongs to the first phase found anywhere on its stack
+PHASE_FUNCTIONS = [
+    ('calendar', {'generate_birthday_calendar'}),
+    ('html', {'generate_html', 'generate_static_statistics_html'}),
+]
+PHASE_MODULES = [
+    ('db', {'database', 'database_sqlite', 'db_writer'}),
+    ('collection', {'vk_api', 'vk_api_async', 'rate_limit', 'counters_cache', 'sharded_collection',
+                    'photo_fetcher', 'photo_cache', 'photo_processing'}),
+]
+# Leaf frames of threads that are just waiting for work
+IDLE_MODULES = {'threading', 'queue'}
+
+def frame_label(code):
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return module, code.co_name
+
+def phase_of(stack):
+    """stack -- [(module, function)] from outermost to innermost."""
+    functions = {function for _, function in stack}
+    modules = {module for module, _ in stack}
+    for phase, names in PHASE_FUNCTIONS:
+        if functions & names:
+            return phase
+    for phase, names in PHASE_MODULES:
+        if modules & names:
+            return phase
+    return 'other'
+
+class StackSampler:
+    """Samples stacks of all threads from a background thread."""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()  # (thread name, ((module, function), ...)) -> samples
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopping.set()
+        self.thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self.stopping.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame_label(frame.f_code))
+                    frame = frame.f_back
+                if not stack or stack[0][0] in IDLE_MODULES:
+                    continue
+                stack.reverse()
+                self.stacks[(names.get(thread_id, str(thread_id)), tuple(stack))] += 1
+
+    def collapsed(self):
+        """Lines in the collapsed-stack format used by flame graph tools."""
+        lines = []
+        for (thread_name, stack), count in sorted(self.stacks.items()):
+            frames = [thread_name.replace(';', '_')] + [f"{module}:{function}" for module, function in stack]
+            lines.append(f"{';'.join(frames)} {count}")
+        return lines
+
+    def hot_by_phase(self, top=TOP_PER_PHASE):
+        """Returns {phase: (samples, [((module, function), self samples), ...])}."""
+        samples, leaves = Counter(), {}
+        for (_, stack), count in self.stacks.items():
+            phase = phase_of(stack)
+            samples[phase] += count
+            leaves.setdefault(phase, Counter())[stack[-1]] += count
+        return {phase: (samples[phase], leaves[phase].most_common(top)) for phase in samples}
+
+def profile_call(func, *args, output='profile', top=TOP_FUNCTIONS, interval=SAMPLE_INTERVAL, **kwargs):
+    """Runs func under cProfile and the stack sampler, writes the dumps and prints the report.
+    Returns what func returned."""
+    profiler = cProfile.Profile()
+    sampler = StackSampler(interval).start()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        sampler.stop()
+        elapsed = time.perf_counter() - started
+        print(report(profiler, sampler, output, top, elapsed))
+
+def report(profiler, sampler, output, top, elapsed):
+    stats_path, collapsed_path = f"{output}.pstats", f"{output}.collapsed"
+    profiler.dump_stats(stats_path)
+    with open(collapsed_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(sampler.collapsed()) + '\n')
+
+    buffer = io.StringIO()
+    stats = pstats.Stats(profiler, stream=buffer)
+    stats.strip_dirs().sort_stats('tottime').print_stats(top)
+
+    lines = [f"\n🔬 Profile: {elapsed:.2f}s wall time",
+             f"   cProfile stats: {os.path.abspath(stats_path)}",
+             f"   Collapsed stacks: {os.path.abspath(collapsed_path)} (flamegraph.pl / speedscope)",
+             f"\n🔥 Top {top} functions by own time (cProfile, main thread):",
+             buffer.getvalue().strip()]
+
+    phases = sampler.hot_by_phase()
+    total_samples = sum(samples for samples, _ in phases.values()) or 1
+    lines.append("\n🔥 Hot functions by phase (sampled, all threads):")
+    for phase, (samples, leaves) in sorted(phases.items(), key=lambda item: -item[1][0]):
+        lines.append(f"   [{phase}] {samples / total_samples:.0%} of samples")
+        for (module, function), count in leaves:
+            lines.append(f"      {count / total_samples:>6.1%}  {module}:{function}")
+    return '\n'.join(lines)
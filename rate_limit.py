@@ -0,0 +1,109 @@
+# rate_limit.py
+import asyncio
+import random
+import threading
+import time
+
+# VK error codes that mean "slow down" rather than a failed request:
+# 6 - too many requests per second, 9 - flood control,
+# 10 - internal server error, 29 - rate limit reached
+THROTTLING_ERRORS = (6, 9, 10, 29)
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30
+
+def is_throttled(data):
+    """Checks whether VK API response is a throttling error."""
+    return isinstance(data, dict) and data.get('error', {}).get('error_code') in THROTTLING_ERRORS
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Exponential backoff with full jitter for retry number `attempt` (from 0)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+class TokenBucket:
+    """Token-bucket limiter: `rate` requests per second, bursts up to `capacity`.
+    Can be shared between threads (acquire) and asyncio tasks (acquire_async)."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        return min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+
+    def available(self):
+        """Tokens available right now (negative if requests are already queued)."""
+        with self.lock:
+            return self._refill(time.monotonic())
+
+    def pause(self, seconds):
+        """Makes the bucket unavailable for at least `seconds`."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self._refill(now), -seconds * self.rate)
+            self.updated = now
+
+    def reserve(self):
+        """Takes one token.
+        Returns the number of seconds to wait before the request may be sent."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = self._refill(now) - 1
+            self.updated = now
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+class RateLimitManager:
+    """Spreads requests over a pool of access tokens.
+    Every token has its own TokenBucket quota; each request takes the token
+    with the most quota left, so throughput grows with the number of tokens."""
+
+    def __init__(self, tokens, rate, max_retries=5):
+        self.buckets = [(token, TokenBucket(rate)) for token in (tokens or [None])]
+        self.max_retries = max_retries
+        self.lock = threading.Lock()
+
+    @property
+    def tokens(self):
+        return [token for token, _ in self.buckets]
+
+    def _reserve(self):
+        with self.lock:
+            token, bucket = max(self.buckets, key=lambda item: item[1].available())
+            return token, bucket.reserve()
+
+    def acquire(self):
+        """Waits until some token has quota. Returns the token to use."""
+        token, delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return token
+
+    async def acquire_async(self):
+        token, delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return token
+
+    def backoff(self, token, attempt):
+        """Pauses a throttled token for a jittered exponential delay.
+        Other tokens keep working; with a single token the next acquire simply waits.
+        Returns the delay in seconds."""
+        delay = backoff_delay(attempt)
+        for bucket_token, bucket in self.buckets:
+            if bucket_token == token:
+                bucket.pause(delay)
+        return delay
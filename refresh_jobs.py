@@ -0,0 +1,117 @@
+# refresh_jobs.py
+"""Background refresh jobs for the web app.
+
+POST /api/refresh returns a job id right away, the collection runs on a worker
+thread and GET /api/refresh/<job_id> reports its progress. While a job is
+queued or running, new refresh requests get that job back instead of starting
+a duplicate collection.
+"""
+import itertools
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+KEEP_FINISHED_JOBS = 20
+
+class RefreshJob:
+    """State of one refresh. Updated by the worker, read by status requests."""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:12]
+        self.status = 'queued'  # queued -> running -> done | error
+        self.total = 0
+        self.done = 0
+        self.api_calls = 0
+        self.errors = 0
+        self.message = ''
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+
+    @property
+    def active(self):
+        return self.status in ('queued', 'running')
+
+    def advance(self, done, api_calls=None, errors=None):
+        self.done = done
+        if api_calls is not None:
+            self.api_calls = api_calls
+        if errors is not None:
+            self.errors = errors
+
+    def eta(self):
+        """Seconds left, estimated from the average pace so far."""
+        if self.status != 'running' or not self.done or not self.total:
+            return None
+        elapsed = time.time() - self.started
+        return max(0.0, elapsed / self.done * (self.total - self.done))
+
+    def to_dict(self):
+        end = self.finished or time.time()
+        eta = self.eta()
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'total': self.total,
+            'done': self.done,
+            'api_calls': self.api_calls,
+            'errors': self.errors,
+            'message': self.message,
+            'elapsed': round(end - self.started, 1) if self.started else 0,
+            'eta': round(eta, 1) if eta is not None else None,
+        }
+
+class RefreshJobs:
+    """Runs refresh jobs on a worker pool, one collection at a time.
+
+    run -- callable(job) doing the collection; it sets job.total, reports
+           progress with job.advance() and may return a final message
+    """
+
+    def __init__(self, run, max_workers=1):
+        self.run = run
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='refresh')
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.current = None
+
+    def submit(self):
+        """Starts a refresh. Returns (job, started); started is False when
+        the request was coalesced into the job that is already active."""
+        with self.lock:
+            if self.current and self.current.active:
+                return self.current, False
+            job = RefreshJob()
+            self.jobs[job.id] = job
+            self.current = job
+            self._forget_old()
+        self.executor.submit(self._execute, job)
+        return job, True
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def _forget_old(self):
+        finished = [job for job in self.jobs.values() if not job.active]
+        for job in itertools.islice(sorted(finished, key=lambda j: j.created),
+                                    max(0, len(finished) - KEEP_FINISHED_JOBS)):
+            del self.jobs[job.id]
+
+    def _execute(self, job):
+        job.status = 'running'
+        job.started = time.time()
+        print(f"🔄 Refresh job {job.id} started...")
+        try:
+            job.message = self.run(job) or ''
+            job.status = 'done'
+            print(f"✅ Refresh job {job.id} done: {job.done}/{job.total} users in {time.time() - job.started:.1f}s.")
+        except Exception as e:
+            job.status = 'error'
+            job.message = str(e)
+            print(f"❌ Refresh job {job.id} failed: {e}")
+        finally:
+            job.finished = time.time()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,102 @@
+# sharded_collection.py
+"""Collection split across worker processes (`main.py --workers N`).
+
+The (db_id, vk_id) pairs are cut into N contiguous shards (aligned to the
+users.get chunk size), every worker process collects its shard with its own
+VKClient session and its own share of the token pool, and the results are
+merged back in the original order.
+
+VK limits requests per token, so the quota is coordinated by giving workers
+disjoint tokens: with N <= tokens every worker gets tokens[i::N] at full
+VK_RPS, with N > tokens workers sharing a token split its VK_RPS. Total
+throughput therefore grows with the number of tokens, not with N alone.
+"""
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from config import APP_MODE, VK_ACCESS_TOKENS, VK_RPS
+from metrics import metrics
+from vk_api import CHUNK_SIZE, token_is_set
+
+def shard_pairs(vk_id_pairs, workers):
+    """Splits pairs into at most `workers` contiguous shards of whole users.get chunks."""
+    chunks = math.ceil(len(vk_id_pairs) / CHUNK_SIZE)
+    shard_size = math.ceil(chunks / max(1, workers)) * CHUNK_SIZE
+    return [vk_id_pairs[i:i + shard_size] for i in range(0, len(vk_id_pairs), shard_size)] if vk_id_pairs else []
+
+def plan_tokens(tokens, workers, rps=VK_RPS):
+    """Returns [(tokens, rps)] per worker, so that no token gets more than `rps` in total."""
+    if workers <= len(tokens):
+        return [(tokens[i::workers], rps) for i in range(workers)]
+    sharing = [len(range(i, workers, len(tokens))) for i in range(len(tokens))]
+    return [([tokens[i % len(tokens)]], rps / sharing[i % len(tokens)]) for i in range(workers)]
+
+def collect_shard(vk_id_pairs, tokens, rps, cache_entries, use_async=False, refresh_counters=True, api_url=None):
+    """Runs in a worker process. Returns (users, collected, cache_entries, metrics);
+    users is None in 'db' mode, where the worker saves through its own DBWriter.
+    The worker's metrics are returned too and merged by the parent."""
+    from counters_cache import CountersCache
+    from utils import setup_logging
+
+    setup_logging()
+    metrics.reset()  # a pool process may run more than one shard
+    counters_cache = CountersCache(path=None)
+    counters_cache.entries = cache_entries
+
+    if use_async:
+        from vk_api_async import get_users_info_concurrent
+        users = get_users_info_concurrent(vk_id_pairs, rps, tokens, counters_cache, refresh_counters, api_url)
+        return users, len(users), counters_cache.entries, metrics.snapshot()
+
+    from vk_api import VKClient, get_users_info, save_users_info
+    client = VKClient(tokens=tokens, rps=rps, api_url=api_url)
+    try:
+        if APP_MODE == 'db':
+            collected = save_users_info(vk_id_pairs, client, counters_cache, refresh_counters)
+            return None, collected, counters_cache.entries, metrics.snapshot()
+        users = get_users_info(vk_id_pairs, client, counters_cache, refresh_counters)
+        return users, len(users), counters_cache.entries, metrics.snapshot()
+    finally:
+        client.close()
+
+def collect_sharded(vk_id_pairs, counters_cache, workers, use_async=False, refresh_counters=True,
+                    tokens=None, rps=VK_RPS, api_url=None):
+    """Collects the pairs in `workers` processes and merges the results.
+    Returns (users_data_from_api, collected) like main.collect_users."""
+    tokens = [token for token in (tokens or VK_ACCESS_TOKENS) if token_is_set(token)]
+    if not tokens:
+        print("❌ Error: VK_ACCESS_TOKEN is not set in config.py")
+        return ([] if APP_MODE != 'db' else None), 0
+
+    shards = shard_pairs(vk_id_pairs, workers)
+    token_plan = plan_tokens(tokens, len(shards), rps)
+    print(f"🧩 Collecting {len(vk_id_pairs)} users in {len(shards)} worker processes "
+          f"({len(tokens)} tokens, up to {sum(shard_rps * len(shard_tokens) for shard_tokens, shard_rps in token_plan):.0f} requests/s).")
+
+    users_data_from_api = None if APP_MODE == 'db' else []
+    collected = 0
+    # spawn: workers start clean instead of inheriting locks held by the parent's threads
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=len(shards), mp_context=context) as pool:
+        futures = []
+        for shard, (shard_tokens, shard_rps) in zip(shards, token_plan):
+            entries = {vk_id: counters_cache.entries[vk_id] for _, vk_id in shard if vk_id in counters_cache.entries}
+            futures.append(pool.submit(
+                collect_shard, shard, shard_tokens, shard_rps, entries, use_async, refresh_counters, api_url
+            ))
+
+        for number, future in enumerate(futures, 1):
+            try:
+                users, shard_collected, entries, worker_metrics = future.result()
+            except Exception as e:
+                print(f"❌ Worker {number} failed: {e}")
+                continue
+            counters_cache.entries.update(entries)
+            metrics.merge(worker_metrics)
+            collected += shard_collected
+            if users_data_from_api is not None:
+                users_data_from_api.extend(users)
+            print(f"✅ Worker {number}/{len(futures)}: {shard_collected} users.")
+
+    return users_data_from_api, collected
@@ -51,7 +51,7 @@ document.addEventListener('DOMContentLoaded', function () {
             }
 
             
-            fetch('/run-main-py', {
+            fetch('/api/refresh', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
@@ -63,13 +63,19 @@ document.addEventListener('DOMContentLoaded', function () {
                 }
                 return response.json();
             })
-            .then(data => {
-                console.log("✅ main.js: Ответ от /run-main-py:", data);
-                if (refreshStatus) refreshStatus.textContent = data.status === 'success' ? '✅ Готово!' : '❌ Ошибка';
-                if (refreshMessage) refreshMessage.textContent = data.message || 'Нет сообщения';
+            .then(job => {
+                console.log("✅ main.js: Задача обновления:", job);
+                if (job.coalesced && refreshMessage) {
+                    refreshMessage.textContent = 'Обновление уже идёт, показываем его прогресс.';
+                }
+                return pollRefreshJob(job.job_id);
+            })
+            .then(job => {
+                if (refreshStatus) refreshStatus.textContent = job.status === 'done' ? '✅ Готово!' : '❌ Ошибка';
+                if (refreshMessage) refreshMessage.textContent = job.message || 'Нет сообщения';
             })
             .catch(error => {
-                console.error("❌ main.js: Ошибка при вызове /run-main-py:", error);
+                console.error("❌ main.js: Ошибка при обновлении данных:", error);
                 if (refreshStatus) refreshStatus.textContent = '❌ Ошибка';
                 if (refreshMessage) {
                     if (error.message) {
@@ -87,6 +93,42 @@ document.addEventListener('DOMContentLoaded', function () {
         });
     }
 
+    function formatRefreshProgress(job) {
+        let text = `⏳ ${job.done} из ${job.total || '?'} пользователей`;
+        text += `, запросов к API: ${job.api_calls}, ошибок: ${job.errors}`;
+        if (job.eta !== null && job.eta !== undefined) {
+            text += `, осталось ~${Math.ceil(job.eta)} с`;
+        }
+        return text;
+    }
+
+    // Polls /api/refresh/<job_id> until the job is finished, resolves with its final state
+    function pollRefreshJob(jobId) {
+        return new Promise((resolve, reject) => {
+            const poll = () => {
+                fetch(`/api/refresh/${jobId}`)
+                    .then(response => {
+                        if (!response.ok) {
+                            return response.json().then(err => { throw err; });
+                        }
+                        return response.json();
+                    })
+                    .then(job => {
+                        if (job.status === 'done' || job.status === 'error') {
+                            resolve(job);
+                            return;
+                        }
+                        if (refreshStatus) {
+                            refreshStatus.textContent = job.status === 'queued' ? '⏳ В очереди...' : formatRefreshProgress(job);
+                        }
+                        setTimeout(poll, 1000);
+                    })
+                    .catch(reject);
+            };
+            poll();
+        });
+    }
+
     if (refreshClose) {
         refreshClose.addEventListener('click', function () {
             if (refreshModal) refreshModal.style.display = 'none';
@@ -0,0 +1,9 @@
+# storage.py
+"""Storage backend chosen by DB_BACKEND: database.py (MySQL) or database_sqlite.py.
+Both modules expose the same functions; import them from here."""
+from config import DB_BACKEND
+
+if DB_BACKEND == 'sqlite':
+    from database_sqlite import *
+else:
+    from database import *
@@ -0,0 +1,215 @@
+# tests/fake_vk_server.py
+"""Local stand-in for the VK API with synthetic data.
+
+Implements users.get, friends.get, users.getFollowers, users.getSubscriptions,
+groups.get, wall.get and execute (for the code built by vk_api.build_counters_code).
+Latency, error injection (6, 15, 30) and a per-token rate limit are configurable.
+
+    server = FakeVKServer(latency=0.01, closed_ratio=0.2).start()
+    client = VKClient(tokens=['fake'], api_url=server.api_url)
+    ...
+    server.stop()
+"""
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+CALL_PATTERN = re.compile(r'API\.([\w.]+)\((\{.*?\})\)')
+
+ERRORS = {
+    6: 'Too many requests per second',
+    15: 'Access denied',
+    30: 'This profile is private',
+}
+
+class FakeVKServer:
+    """Threaded HTTP server answering like api.vk.com/method/.
+
+    latency      -- seconds to wait before every answer
+    closed_ratio -- share of users with closed profiles (counter calls fail with 15/30)
+    error6_ratio -- share of requests answered with error 6
+    rate_limit   -- requests per second allowed for one access_token (None - unlimited)
+    """
+
+    def __init__(self, latency=0.0, closed_ratio=0.0, error6_ratio=0.0, rate_limit=None, seed=1):
+        self.latency = latency
+        self.closed_ratio = closed_ratio
+        self.error6_ratio = error6_ratio
+        self.rate_limit = rate_limit
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = defaultdict(int)  # method -> HTTP requests
+        self.api_calls = 0  # API calls including the ones inside execute
+        self.token_history = defaultdict(deque)
+        self.httpd = None
+        self.thread = None
+
+    # --- Synthetic data ---
+
+    def is_closed(self, vk_id):
+        return (vk_id * 2654435761 % 1000) / 1000 < self.closed_ratio
+
+    def user(self, vk_id):
+        return {
+            'id': vk_id,
+            'first_name': 'User',
+            'last_name': str(vk_id),
+            'online': int(vk_id % 3 == 0),
+            'photo_200': f'https://sun.userapi.com/fake/{vk_id}.jpg',
+            'last_seen': {'time': 1700000000 + vk_id, 'platform': 7},
+            'city': {'id': 1, 'title': 'Moscow'} if vk_id % 2 else {'id': 2, 'title': 'Saint Petersburg'},
+            'bdate': f'{vk_id % 28 + 1}.{vk_id % 12 + 1}.{1970 + vk_id % 40}',
+            'relation': vk_id % 9,
+            'counters': {'friends': vk_id % 500, 'photos': vk_id % 70},
+            'domain': f'id{vk_id}',
+        }
+
+    def method_result(self, method, params):
+        """Returns (response, error_code) for one API call."""
+        vk_id = int(params.get('user_id') or params.get('owner_id') or 0)
+        if method != 'users.get' and self.is_closed(vk_id):
+            return None, 30 if method in ('wall.get', 'friends.get') else 15
+        if method == 'friends.get':
+            return {'count': vk_id % 500, 'items': []}, None
+        if method == 'users.getFollowers':
+            return {'count': vk_id % 300, 'items': []}, None
+        if method == 'users.getSubscriptions':
+            return {'users': {'count': vk_id % 40, 'items': []}, 'groups': {'count': vk_id % 60, 'items': []}}, None
+        if method == 'groups.get':
+            return {'count': vk_id % 60, 'items': []}, None
+        if method == 'wall.get':
+            return {'count': vk_id % 1000, 'items': []}, None
+        return None, 3
+
+    # --- Request handling ---
+
+    def _rate_limited(self, token):
+        if not self.rate_limit:
+            return False
+        now = time.monotonic()
+        with self.lock:
+            history = self.token_history[token]
+            while history and now - history[0] > 1:
+                history.popleft()
+            if len(history) >= self.rate_limit:
+                return True
+            history.append(now)
+        return False
+
+    def handle(self, method, params):
+        with self.lock:
+            self.calls[method] += 1
+            inject_error6 = self.random.random() < self.error6_ratio
+        if self.latency:
+            time.sleep(self.latency)
+
+        if inject_error6 or self._rate_limited(params.get('access_token')):
+            return error_body(6)
+
+        if method == 'users.get':
+            with self.lock:
+                self.api_calls += 1
+            ids = [int(vk_id) for vk_id in params.get('user_ids', '').split(',') if vk_id]
+            return {'response': [self.user(vk_id) for vk_id in ids]}
+
+        if method == 'execute':
+            return self.execute(params.get('code', ''))
+
+        with self.lock:
+            self.api_calls += 1
+        response, error_code = self.method_result(method, params)
+        return error_body(error_code) if error_code else {'response': response}
+
+    def execute(self, code):
+        """Runs calls from `return [[API.x({...}), ...], ...];` code, like VK does."""
+        execute_errors = []
+        calls = CALL_PATTERN.findall(code)
+        if len(calls) > 25:
+            return error_body(13, 'Too many API calls')
+
+        def run_call(match):
+            method, params = match.group(1), json.loads(match.group(2))
+            response, error_code = self.method_result(method, params)
+            if error_code:
+                execute_errors.append({'method': method, 'error_code': error_code, 'error_msg': ERRORS.get(error_code, '')})
+                return 'false'
+            return json.dumps(response)
+
+        with self.lock:
+            self.api_calls += len(calls)
+        body = CALL_PATTERN.sub(run_call, code).strip()
+        body = body[len('return'):].strip().rstrip(';')
+        result = {'response': json.loads(body)}
+        if execute_errors:
+            result['execute_errors'] = execute_errors
+        return result
+
+    # --- Server lifecycle ---
+
+    @property
+    def api_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}/method/'
+
+    def start(self, host='127.0.0.1', port=0):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True  # headers and body are separate writes
+
+            def log_message(self, *args):
+                pass
+
+            def _answer(self, params):
+                method = urlparse(self.path).path.rsplit('/', 1)[-1]
+                body = json.dumps(server.handle(method, params)).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                self._answer({key: values[0] for key, values in query.items()})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                query = parse_qs(self.rfile.read(length).decode('utf-8'))
+                self._answer({key: values[0] for key, values in query.items()})
+
+        class Server(ThreadingHTTPServer):
+            request_queue_size = 128  # the default backlog of 5 drops connects of a concurrent client (1 s SYN retry)
+
+        self.httpd = Server((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='fake-vk', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+
+    def requests_total(self):
+        with self.lock:
+            return sum(self.calls.values())
+
+def error_body(error_code, error_msg=None):
+    return {'error': {'error_code': error_code, 'error_msg': error_msg or ERRORS.get(error_code, 'Unknown error')}}
+
+if __name__ == '__main__':
+    fake = FakeVKServer().start(port=8090)
+    print(f"🧪 Fake VK API at {fake.api_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        fake.stop()
@@ -0,0 +1,113 @@
+import unittest
+import sys
+import os
+import socket
+import threading
+import time
+import json
+from multiprocessing.connection import Client
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from collector_daemon import CollectorDaemon, send_command
+
+AUTHKEY = 'test-key'
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+class TestCollectorDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+        self.port = free_port()
+
+    def collect(self):
+        self.calls += 1
+        self.release.wait(5)
+        return 42
+
+    def start_daemon(self, interval=0):
+        daemon = CollectorDaemon(self.collect, interval=interval, port=self.port, authkey=AUTHKEY).start()
+        self.addCleanup(daemon.stop)
+        return daemon
+
+    def command(self, command, **params):
+        return send_command(command, port=self.port, authkey=AUTHKEY, **params)
+
+    def test_collect_and_status(self):
+        self.start_daemon()
+        reply = self.command('collect', wait=True, timeout=5)
+        self.assertEqual(reply['status'], 'ok', "❌ Collection should succeed")
+        self.assertEqual(reply['result']['collected'], 42, "❌ Collected count should be returned")
+
+        status = self.command('status', timeout=5)
+        self.assertEqual(status['runs'], 1, "❌ One run should be recorded")
+        self.assertFalse(status['running'], "❌ Daemon should be idle")
+        print("✅ test_collect_and_status: Collection triggered over IPC.")
+
+    def test_requests_coalesce_while_running(self):
+        daemon = self.start_daemon()
+        self.release.clear()
+        first = self.command('collect', timeout=5)['run']
+        while not daemon.running:
+            time.sleep(0.01)
+
+        runs = [self.command('collect', timeout=5)['run'] for _ in range(5)]
+        self.assertEqual(set(runs), {first + 1}, "❌ Requests during a run should share the next run")
+
+        self.release.set()
+        self.assertTrue(daemon.wait_for(first + 1, timeout=5), "❌ Coalesced run should finish")
+        self.assertEqual(self.calls, 2, "❌ Six requests should cause only two collections")
+        print("✅ test_requests_coalesce_while_running: 6 requests -> 2 collections.")
+
+    def test_collect_timeout(self):
+        self.start_daemon()
+        self.release.clear()
+        reply = self.command('collect', wait=True, timeout=0.2)
+        self.release.set()
+        self.assertEqual(reply['status'], 'error', "❌ Collection past the timeout should be an error")
+        print(f"✅ test_collect_timeout: {reply['message']}")
+
+    def test_scheduled_collection(self):
+        daemon = self.start_daemon(interval=0.1)
+        self.assertTrue(daemon.wait_for(2, timeout=5), "❌ Scheduled collections should run")
+        print("✅ test_scheduled_collection: Collections run on schedule.")
+
+    def test_no_daemon_and_wrong_key(self):
+        self.assertIsNone(self.command('status', timeout=1), "❌ No daemon should give None")
+
+        self.start_daemon()
+        with self.assertRaises(Exception, msg="❌ Wrong authkey should be rejected"):
+            send_command('status', port=self.port, authkey='wrong', timeout=1)
+        self.assertEqual(self.command('status', timeout=5)['status'], 'ok', "❌ Daemon should keep serving")
+        print("✅ test_no_daemon_and_wrong_key: Missing daemon and wrong key handled.")
+
+    def test_weak_authkey_refused(self):
+        for authkey in ('', 'key', 'your-key'):
+            with self.assertRaises(ValueError, msg=f"❌ Authkey {authkey!r} should be refused"):
+                CollectorDaemon(self.collect, port=self.port, authkey=authkey)
+        self.assertIsNone(send_command('status', port=self.port, authkey='', timeout=1),
+                          "❌ Client without a key should not try to connect")
+        print("✅ test_weak_authkey_refused: Missing and example keys refused.")
+
+    def test_messages_are_json(self):
+        daemon = self.start_daemon()
+        conn = Client(daemon.address, authkey=AUTHKEY.encode('utf-8'))
+        with conn:
+            conn.send({'command': 'status'})  # a pickle is not accepted
+            with self.assertRaises(EOFError, msg="❌ Pickled message should be rejected"):
+                conn.recv_bytes()
+        conn = Client(daemon.address, authkey=AUTHKEY.encode('utf-8'))
+        with conn:
+            conn.send_bytes(b'["status"]')
+            self.assertEqual(json.loads(conn.recv_bytes())['status'], 'error', "❌ Non-object should be rejected")
+        self.assertEqual(self.command('status', timeout=5)['status'], 'ok', "❌ Daemon should keep serving")
+        print("✅ test_messages_are_json: Only JSON commands accepted.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from counters_cache import CountersCache
+
+TTLS = {'friends_count': 100, 'followers_count': 100, 'wall_count': 0}
+
+class TestCountersCache(unittest.TestCase):
+
+    def setUp(self):
+        self.vk_user = {'id': 1, 'counters': {'friends': 10, 'photos': 5}}
+
+    def test_missing_user_requests_all_fields(self):
+        cache = CountersCache(path=None, ttls=TTLS)
+        self.assertEqual(cache.plan([self.vk_user]), {1: list(TTLS)}, "❌ New user should request every counter")
+        print("✅ test_missing_user_requests_all_fields: All counters planned.")
+
+    def test_ttl_and_negative_cache(self):
+        cache = CountersCache(path=None, ttls=TTLS, closed_ttl=100)
+        cache.store(self.vk_user, {'friends_count': 10, 'followers_count': None, 'wall_count': 7},
+                    closed={(1, 'followers_count')})
+        self.assertEqual(cache.plan([self.vk_user]), {1: ['wall_count']}, "❌ Only expired counter should be planned")
+        self.assertEqual(cache.get(1), {'friends_count': 10, 'followers_count': None, 'wall_count': 7})
+        self.assertEqual(cache.plan([self.vk_user], check_ttl=False), {}, "❌ Cached user should be skipped")
+        print("✅ test_ttl_and_negative_cache: TTL and closed profiles handled.")
+
+    def test_temporary_failure_keeps_values(self):
+        cache = CountersCache(path=None, ttls=TTLS)
+        cache.store(self.vk_user, {'friends_count': 10, 'followers_count': 3, 'wall_count': 7})
+        cache.store(self.vk_user, {'friends_count': None, 'followers_count': None, 'wall_count': None}, closed=set())
+        self.assertEqual(cache.get(1), {'friends_count': 10, 'followers_count': 3, 'wall_count': 7},
+                         "❌ Failed request should not erase cached counters")
+        self.assertEqual(cache.plan([self.vk_user]), {1: list(TTLS)}, "❌ Failed counters should be requested again")
+        print("✅ test_temporary_failure_keeps_values: Last known counters kept.")
+
+    def test_signal_change_invalidates(self):
+        cache = CountersCache(path=None, ttls=TTLS)
+        cache.store(self.vk_user, {'friends_count': 10, 'followers_count': 3, 'wall_count': 7})
+        changed_user = {'id': 1, 'counters': {'friends': 11, 'photos': 5}}
+        self.assertEqual(cache.plan([changed_user], check_ttl=False), {1: list(TTLS)},
+                         "❌ Changed counters.friends should invalidate the entry")
+        print("✅ test_signal_change_invalidates: Entry invalidated.")
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'counters_cache.json')
+            cache = CountersCache(path=path, ttls=TTLS)
+            cache.store(self.vk_user, {'friends_count': 10, 'followers_count': 3, 'wall_count': 7})
+            cache.save()
+
+            loaded = CountersCache.load(path, ttls=TTLS)
+            self.assertIn(1, loaded, "❌ User not found after loading")
+            self.assertEqual(loaded.get(1), cache.get(1), "❌ Loaded counters do not match")
+        print("✅ test_save_and_load: Cache persisted.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+# tests/test_database_sqlite.py
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import database_sqlite
+from database_sqlite import (
+    connect_db, load_vk_ids, add_vk_user, delete_vk_user, load_archived_users, restore_user_from_archive,
+    save_to_db, save_users_bulk, load_users_with_latest_photos, load_user_visits_for_chart,
+    load_activity_stats, load_weekly_activity_stats, load_city_activity_stats
+)
+from db_writer import DBWriter
+
+PHOTO = b'\x89PNG fake avatar'
+
+def make_user(vk_id, name, online=1, city='Moscow'):
+    return {
+        'id': vk_id,
+        'name': name,
+        'online': online,
+        'photo_200': 'https://vk.com/images/camera_200.png',
+        'last_seen': {'time': 1700000000, 'platform': 7},
+        'city': city,
+        'bdate': '01.01.1990',
+        'relation': 1,
+        'friends_count': 100,
+        'followers_count': 50,
+        'subscriptions_count': 20,
+        'groups_count': 30,
+        'domain': f'user{vk_id}'
+    }
+
+class TestDatabaseSqlite(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.saved = database_sqlite.SQLITE_PATH, database_sqlite.fetch_photos
+        database_sqlite.SQLITE_PATH = os.path.join(self.tmp_dir.name, 'test.db')
+        database_sqlite.fetch_photos = lambda urls: {url: PHOTO for url in urls if url}
+
+    def tearDown(self):
+        conn = getattr(database_sqlite._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            database_sqlite._local.conn = None
+        database_sqlite.SQLITE_PATH, database_sqlite.fetch_photos = self.saved
+        self.tmp_dir.cleanup()
+
+    def test_connect_db(self):
+        conn = connect_db()
+        self.assertIsNotNone(conn, "❌ connect_db() returned None")
+        self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal', "❌ WAL journal not enabled")
+        conn.close()
+        print("✅ test_connect_db: SQLite database opened in WAL mode.")
+
+    def test_schema_created_once(self):
+        connect_db().close()
+        original_schema = database_sqlite.SCHEMA
+        database_sqlite.SCHEMA = 'this is not SQL'  # would fail if run again
+        try:
+            conn = connect_db()
+            self.assertIsNotNone(conn, "❌ Schema should not be created again")
+            conn.close()
+        finally:
+            database_sqlite.SCHEMA = original_schema
+        print("✅ test_schema_created_once: Later connections skip the DDL.")
+
+    def test_save_and_load_user(self):
+        self.assertTrue(add_vk_user(1), "❌ add_vk_user() should add a new user")
+        self.assertFalse(add_vk_user(1), "❌ add_vk_user() should not add the same user twice")
+        db_id = load_vk_ids()[0][0]
+
+        test_user_data = make_user(1, 'Test User')
+        save_to_db(db_id, make_user(1, 'Old Name'))
+        save_to_db(db_id, test_user_data)
+
+        users = load_users_with_latest_photos()
+        self.assertEqual(len(users), 1, "❌ Only the latest snapshot should be returned")
+        user = users[0]
+        self.assertEqual(user['user_id'], db_id, "❌ user_id should be the db id")
+        self.assertEqual(user['id'], 1, "❌ id should be the VK id")
+        for key in ('name', 'online', 'city', 'bdate', 'relation', 'friends_count', 'followers_count',
+                    'subscriptions_count', 'groups_count', 'domain'):
+            self.assertEqual(user[key], test_user_data[key], f"❌ {key} does not match")
+        self.assertEqual(user['last_seen'], 1700000000, "❌ last_seen should be the time")
+        self.assertTrue(user['photo_base64'], "❌ Photo should be returned as base64")
+        print("✅ test_save_and_load_user: Data loaded successfully and matches.")
+
+    def test_bulk_save_deduplicates_photos(self):
+        for vk_id in (1, 2, 3):
+            add_vk_user(vk_id)
+        records = [(db_id, make_user(vk_id, f'User {vk_id}')) for db_id, vk_id in load_vk_ids()]
+        self.assertTrue(save_users_bulk(records), "❌ save_users_bulk() failed")
+        self.assertTrue(save_users_bulk(records), "❌ save_users_bulk() failed")
+
+        conn = connect_db()
+        photos = conn.execute('SELECT COUNT(*) FROM photos').fetchone()[0]
+        snapshots = conn.execute('SELECT COUNT(*) FROM user_status').fetchone()[0]
+        conn.close()
+        self.assertEqual(photos, 1, "❌ The same avatar should be stored once")
+        self.assertEqual(snapshots, 6, "❌ Every save should add a snapshot")
+        self.assertEqual(len(load_users_with_latest_photos()), 3, "❌ Every user should be loaded")
+        print(f"✅ test_bulk_save_deduplicates_photos: {snapshots} snapshots, {photos} photo.")
+
+    def test_failed_transaction_is_reported(self):
+        add_vk_user(1)
+        db_id = load_vk_ids()[0][0]
+        bad_user = dict(make_user(1, 'Bad'), domain={'not': 'bindable'})
+        records = [(db_id, make_user(1, 'Good')), (db_id, bad_user)]
+
+        with self.assertRaises(sqlite3.Error, msg="❌ Rolled back batch should raise"):
+            save_users_bulk(records)
+        self.assertEqual(load_users_with_latest_photos(), [], "❌ Nothing should be saved from the failed batch")
+        self.assertFalse(save_to_db(db_id, bad_user), "❌ save_to_db() should return False")
+
+        writer = DBWriter(save_batch=save_users_bulk)
+        for db_id_, full_user in records:
+            writer.put(db_id_, full_user)
+        writer.start().close()
+        self.assertEqual((writer.saved, writer.failed), (0, 2), "❌ DB writer should count the batch as failed")
+        print("✅ test_failed_transaction_is_reported: Rolled back batch counted as failed.")
+
+    def test_photo_fetcher_reused(self):
+        fetch_photos = self.saved[1]
+        self.assertEqual(fetch_photos([None]), {}, "❌ Users without photo need no download")
+        fetcher = database_sqlite._photo_fetcher
+        fetch_photos([])
+        self.assertIs(database_sqlite._photo_fetcher, fetcher, "❌ One PhotoFetcher should serve every save")
+        print("✅ test_photo_fetcher_reused: Fetcher shared between saves.")
+
+    def test_archive_and_restore(self):
+        add_vk_user(5)
+        db_id = load_vk_ids()[0][0]
+        save_to_db(db_id, make_user(5, 'Archived User'))
+
+        self.assertTrue(delete_vk_user(db_id), "❌ delete_vk_user() failed")
+        self.assertEqual(load_vk_ids(), [], "❌ Deleted user should leave the list")
+        archived = load_archived_users(50)
+        self.assertEqual(archived[0]['original_name'], 'Archived User', "❌ Name should be archived")
+        self.assertIsInstance(archived[0]['archived_at'], datetime, "❌ archived_at should be a datetime")
+
+        self.assertTrue(restore_user_from_archive(archived[0]['id']), "❌ restore_user_from_archive() failed")
+        self.assertEqual(load_vk_ids(), [(db_id, 5)], "❌ User should be restored under the old id")
+        self.assertEqual(load_archived_users(50), [], "❌ Restored user should leave the archive")
+        self.assertEqual(load_users_with_latest_photos()[0]['name'], 'Archived User', "❌ History should be kept")
+        print("✅ test_archive_and_restore: User archived and restored.")
+
+    def test_restore_when_user_added_again(self):
+        add_vk_user(7)
+        delete_vk_user(load_vk_ids()[0][0])
+        add_vk_user(7)
+        archived = load_archived_users(50)
+
+        self.assertFalse(restore_user_from_archive(archived[0]['id']), "❌ Nothing was restored")
+        self.assertEqual(len(load_archived_users(50)), 1, "❌ Archive entry should be kept")
+        self.assertEqual(len(load_vk_ids()), 1, "❌ User should not be duplicated")
+        print("✅ test_restore_when_user_added_again: Archive entry kept.")
+
+    def test_visits_and_statistics(self):
+        add_vk_user(1)
+        add_vk_user(2)
+        (first, _), (second, _) = load_vk_ids()
+        save_to_db(first, make_user(1, 'A', online=1, city='Moscow'))
+        save_to_db(second, make_user(2, 'B', online=1, city='Kazan'))
+        save_to_db(first, make_user(1, 'A', online=0, city='Moscow'))
+
+        visits = load_user_visits_for_chart(first)
+        self.assertEqual([visit['online'] for visit in visits], [1, 0], "❌ Visits should be in save order")
+        datetime.fromisoformat(visits[0]['timestamp'])
+
+        hourly = load_activity_stats()
+        self.assertEqual(len(hourly), 24, "❌ Every hour should be present")
+        self.assertEqual(hourly[datetime.now().hour]['count'], 2, "❌ Both users were online this hour")
+        weekly = load_weekly_activity_stats()
+        self.assertEqual(weekly[datetime.now().weekday()]['count'], 2, "❌ Both users were online today")
+        cities = load_city_activity_stats(20)
+        self.assertEqual(sorted(city['city_name'] for city in cities), ['Kazan', 'Moscow'],
+                         "❌ Cities should be counted")
+        print("✅ test_visits_and_statistics: Visits and statistics loaded.")
+
+if __name__ == '__main__':
+    unittest.main()
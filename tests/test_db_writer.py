@@ -0,0 +1,76 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import db_writer
+from db_writer import DBWriter
+
+class TestDBWriter(unittest.TestCase):
+
+    def test_all_records_saved_in_batches(self):
+        batches = []
+        writer = DBWriter(batch_size=10, save_batch=batches.append)
+        with writer:
+            for i in range(25):
+                writer.put(i, {'id': i, 'name': f'User {i}'})
+
+        saved_ids = [db_id for batch in batches for db_id, _ in batch]
+        self.assertEqual(saved_ids, list(range(25)), "❌ Records should be saved once and in order")
+        self.assertTrue(all(len(batch) <= 10 for batch in batches), "❌ Batch size exceeded")
+        self.assertEqual(writer.saved, 25, "❌ Saved counter is wrong")
+        print(f"✅ test_all_records_saved_in_batches: {len(batches)} batches written.")
+
+    def test_writes_run_in_background_thread(self):
+        threads = set()
+        writer = DBWriter(save_batch=lambda batch: threads.add(threading.current_thread().name))
+        with writer:
+            writer.put(1, {'id': 1})
+        self.assertEqual(threads, {'db-writer'}, "❌ Batches should be saved by the writer thread")
+        print("✅ test_writes_run_in_background_thread: Writer thread used.")
+
+    def test_failed_batch_is_counted(self):
+        def fail(batch):
+            raise RuntimeError("DB is down")
+
+        writer = DBWriter(save_batch=fail)
+        with writer:
+            writer.put(1, {'id': 1})
+        self.assertEqual((writer.saved, writer.failed), (0, 1), "❌ Failed batch should be counted")
+        print("✅ test_failed_batch_is_counted: Failure reported.")
+
+    def test_bulk_api_used_when_available(self):
+        bulk_calls = []
+        original = db_writer.storage_functions
+        db_writer.storage_functions = lambda: (None, bulk_calls.append)
+        try:
+            writer = DBWriter(batch_size=95)
+            for i in range(190):
+                writer.put(i, {'id': i})
+            writer.start().close()
+        finally:
+            db_writer.storage_functions = original
+
+        self.assertEqual([len(batch) for batch in bulk_calls], [95, 95], "❌ Each batch should be one bulk call")
+        print("✅ test_bulk_api_used_when_available: 190 users in 2 bulk writes.")
+
+    def test_batch_waits_for_slow_producer(self):
+        batches = []
+        with DBWriter(batch_size=10, save_batch=batches.append, max_wait=5) as writer:
+            for i in range(10):
+                writer.put(i, {'id': i})
+                time.sleep(0.01)  # queue is empty between records
+        self.assertEqual([len(batch) for batch in batches], [10], "❌ Batch should not be cut when the queue is empty")
+
+        batches = []
+        with DBWriter(batch_size=10, save_batch=batches.append, max_wait=0.05) as writer:
+            writer.put(1, {'id': 1})
+            time.sleep(0.5)
+            self.assertEqual(len(batches), 1, "❌ Partial batch should be written after max_wait")
+        print("✅ test_batch_waits_for_slow_producer: Batches filled, partial batch flushed after max_wait.")
+
+if __name__ == '__main__':
+    unittest.main()
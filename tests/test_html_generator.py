@@ -2,10 +2,15 @@
 import unittest
 import sys
 import os
+import tempfile
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from html_generator import generate_html, format_bdate, calculate_age
+import photo_cache
+from photo_cache import PhotoCache
+from html_generator import generate_html, format_bdate, calculate_age, page_users, cached_photo_src
+from vk_api import build_full_user
+from config import OUTPUT_HTML
 
 class TestHtmlGenerator(unittest.TestCase):
 
@@ -39,6 +44,50 @@ class TestHtmlGenerator(unittest.TestCase):
         self.assertTrue(html_generated, "❌ generate_html raised an exception")
         print("✅ test_generate_html_no_error: HTML generated without errors.")
 
+    def test_memory_mode_users_render(self):
+        """Users straight from vk_api.build_full_user ('memory' mode) should render."""
+        vk_users = [
+            {'id': 5, 'first_name': 'Test', 'last_name': 'User', 'online': 0, 'domain': 'id5',
+             'last_seen': {'time': 1700000000, 'platform': 7}, 'city': {'title': 'Moscow'}, 'bdate': '01.01.1990'},
+            {'id': 6, 'first_name': 'Hidden', 'last_name': 'User', 'online': 1},
+        ]
+        counters = {'friends_count': 10, 'followers_count': None, 'subscriptions_count': 2,
+                    'groups_count': None, 'wall_count': 3}
+        users = page_users([build_full_user(vk_user, counters) for vk_user in vk_users])
+
+        self.assertEqual(users[0]['last_seen'], 1700000000, "❌ last_seen should become a timestamp")
+        self.assertEqual(users[0]['user_id'], 5, "❌ user_id should be set")
+        self.assertEqual((users[1]['city'], users[1]['bdate']), ('—', '—'), "❌ Unknown city and bdate should be '—'")
+        generate_html(users)
+        with open(OUTPUT_HTML, encoding='utf-8') as f:
+            html = f.read()
+        self.assertIn('Test User', html, "❌ User card not rendered")
+        self.assertNotIn('@id5', html, "❌ Default domain should not be shown")
+        print("✅ test_memory_mode_users_render: build_full_user output rendered.")
+
+    def test_memory_mode_links_cached_photos(self):
+        """Avatars prefetched in 'memory' mode should be linked from the photo cache."""
+        photo_url = 'https://sun.userapi.com/avatar_5.jpg'
+        vk_user = {'id': 5, 'first_name': 'Test', 'last_name': 'User', 'online': 0, 'photo_200': photo_url}
+        counters = dict.fromkeys(('friends_count', 'followers_count', 'subscriptions_count',
+                                  'groups_count', 'wall_count'))
+        users = page_users([build_full_user(vk_user, counters)])
+
+        saved_cache = photo_cache._photo_cache
+        with tempfile.TemporaryDirectory() as directory:
+            photo_cache._photo_cache = PhotoCache(directory)
+            try:
+                photo_cache._photo_cache.store(photo_url, b'jpeg-bytes')
+                src = cached_photo_src(photo_url)
+                generate_html(users)
+            finally:
+                photo_cache._photo_cache = saved_cache
+        with open(OUTPUT_HTML, encoding='utf-8') as f:
+            html = f.read()
+        self.assertIn('blobs/', src, "❌ Cached avatar should be a blob")
+        self.assertIn(f'src="{src}"', html, "❌ Cached avatar should be linked")
+        print("✅ test_memory_mode_links_cached_photos: Prefetched avatar linked from the cache.")
+
     def test_format_bdate_full(self):
         bdate = "01.01.1990"
         expected = "1 January 1990"
@@ -0,0 +1,76 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from metrics import Metrics, metrics
+from vk_api import VKClient, get_users_info
+from tests.fake_vk_server import FakeVKServer
+
+class TestMetrics(unittest.TestCase):
+
+    def test_timer_and_counters(self):
+        registry = Metrics()
+        for _ in range(3):
+            with registry.timer('stage_seconds', stage='collect'):
+                pass
+        with self.assertRaises(ValueError):
+            with registry.timer('vk_api_request_seconds', method='users.get', result='ok'):
+                raise ValueError("boom")
+        registry.inc('users_collected_total', 5)
+
+        histograms = {key: histogram.count for key, histogram in registry.histograms.items()}
+        self.assertEqual(histograms[('stage_seconds', (('stage', 'collect'),))], 3, "❌ Timer should observe every block")
+        self.assertIn(('vk_api_request_seconds', (('method', 'users.get'), ('result', 'exception'))), histograms,
+                      "❌ Exceptions should be recorded with result=exception")
+        self.assertEqual(registry.counters[('users_collected_total', ())], 5, "❌ Counter should be increased")
+        print("✅ test_timer_and_counters: Timings and counts recorded.")
+
+    def test_prometheus_format(self):
+        registry = Metrics()
+        registry.observe('db_call_seconds', 0.02, function='load_vk_ids')
+        registry.observe('db_call_seconds', 3, function='load_vk_ids')
+        text = registry.prometheus()
+
+        self.assertIn('# TYPE db_call_seconds histogram', text, "❌ TYPE line missing")
+        self.assertIn('db_call_seconds_bucket{function="load_vk_ids",le="0.025"} 1', text, "❌ Buckets should be cumulative")
+        self.assertIn('db_call_seconds_bucket{function="load_vk_ids",le="+Inf"} 2', text, "❌ +Inf bucket missing")
+        self.assertIn('db_call_seconds_count{function="load_vk_ids"} 2', text, "❌ Count missing")
+        print("✅ test_prometheus_format: Exposition format is valid.")
+
+    def test_merge_snapshot(self):
+        parent, worker = Metrics(), Metrics()
+        parent.observe('stage_seconds', 1, stage='collect')
+        worker.observe('stage_seconds', 2, stage='collect')
+        worker.inc('users_collected_total', 10)
+        parent.merge(worker.snapshot())
+
+        histogram = parent.histograms[('stage_seconds', (('stage', 'collect'),))]
+        self.assertEqual((histogram.count, histogram.sum, histogram.max), (2, 3, 2), "❌ Histograms should be merged")
+        self.assertEqual(parent.counters[('users_collected_total', ())], 10, "❌ Counters should be merged")
+        print("✅ test_merge_snapshot: Worker metrics merged.")
+
+    def test_vk_requests_recorded_by_method_and_result(self):
+        metrics.reset()
+        server = FakeVKServer(error6_ratio=0.3).start()
+        client = VKClient(tokens=['fake_token'], api_url=server.api_url, rps=1000)
+        try:
+            get_users_info([(i, i) for i in range(1, 31)], client=client)
+        finally:
+            client.close()
+            server.stop()
+
+        by_label = {}
+        for (name, labels), histogram in metrics.histograms.items():
+            if name == 'vk_api_request_seconds':
+                result = dict(labels)['result']
+                by_label[result] = by_label.get(result, 0) + histogram.count
+        self.assertEqual(sum(by_label.values()), server.requests_total(), "❌ Every HTTP request should be timed")
+        self.assertIn('ok', by_label, "❌ Successful requests should be recorded")
+        self.assertEqual(by_label.get('error_6', 0), client.requests - by_label['ok'], "❌ Error 6 should be recorded")
+        self.assertIn("vk_api_request_seconds", metrics.report(), "❌ Report should list VK requests")
+        print(f"✅ test_vk_requests_recorded_by_method_and_result: {by_label}")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import photo_cache
+from photo_cache import PhotoCache
+
+original_grace = photo_cache.BLOB_GRACE
+
+class FakeResponse:
+    def __init__(self, status_code, content=b'', headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+class FakeClient:
+    """Returns prepared responses and records request headers."""
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None):
+        self.requests.append((url, headers or {}))
+        return self.responses.pop(0)
+
+class TestPhotoCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.directory = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_fresh_photo_is_not_downloaded_again(self):
+        cache = PhotoCache(self.directory, revalidate_after=3600)
+        client = FakeClient([FakeResponse(200, b'jpeg-bytes', {'content-type': 'image/jpeg', 'etag': '"v1"'})])
+        self.assertEqual(cache.get('https://vk.com/a.jpg', client), b'jpeg-bytes')
+        self.assertEqual(cache.get('https://vk.com/a.jpg', client), b'jpeg-bytes')
+        self.assertEqual(len(client.requests), 1, "❌ Fresh photo should be served from cache")
+        print("✅ test_fresh_photo_is_not_downloaded_again: One download for two calls.")
+
+    def test_revalidation_with_etag(self):
+        cache = PhotoCache(self.directory, revalidate_after=0)
+        client = FakeClient([
+            FakeResponse(200, b'jpeg-bytes', {'content-type': 'image/jpeg', 'etag': '"v1"'}),
+            FakeResponse(304)
+        ])
+        cache.get('https://vk.com/a.jpg', client)
+        self.assertEqual(cache.get('https://vk.com/a.jpg', client), b'jpeg-bytes', "❌ 304 should return cached photo")
+        self.assertEqual(client.requests[1][1].get('If-None-Match'), '"v1"', "❌ ETag was not sent")
+        print("✅ test_revalidation_with_etag: Conditional request used.")
+
+    def test_same_content_stored_once(self):
+        cache = PhotoCache(self.directory)
+        cache.store('https://vk.com/a.jpg', b'same-bytes')
+        cache.store('https://vk.com/b.jpg', b'same-bytes')
+        self.assertEqual(cache.cached_path('https://vk.com/a.jpg'), cache.cached_path('https://vk.com/b.jpg'))
+        self.assertEqual(len(os.listdir(os.path.join(self.directory, 'blobs'))), 1, "❌ Duplicate blob stored")
+        print("✅ test_same_content_stored_once: Blob deduplicated.")
+
+    def test_lru_eviction(self):
+        cache = PhotoCache(self.directory, max_bytes=10)
+        cache.store('https://vk.com/old.jpg', b'123456')
+        cache.store('https://vk.com/new.jpg', b'abcdef')
+        self.assertIsNone(cache.cached_path('https://vk.com/old.jpg'), "❌ Least recently used photo should be evicted")
+        self.assertIsNotNone(cache.cached_path('https://vk.com/new.jpg'), "❌ New photo should stay")
+        self.assertLessEqual(cache.total_bytes(), 10)
+        print("✅ test_lru_eviction: Cache size limited.")
+
+    def test_index_persisted(self):
+        cache = PhotoCache(self.directory)
+        cache.store('https://vk.com/a.jpg', b'jpeg-bytes')
+        cache.save()
+        self.assertEqual(PhotoCache(self.directory).read('https://vk.com/a.jpg'), b'jpeg-bytes')
+        print("✅ test_index_persisted: Index saved and loaded.")
+
+    def test_processes_merge_their_entries(self):
+        first, second = PhotoCache(self.directory), PhotoCache(self.directory)
+        first.store('https://vk.com/a.jpg', b'a-bytes')
+        second.store('https://vk.com/b.jpg', b'b-bytes')
+        first.save()
+        second.save()
+        loaded = PhotoCache(self.directory)
+        self.assertEqual(loaded.read('https://vk.com/a.jpg'), b'a-bytes', "❌ First process entry was overwritten")
+        self.assertEqual(loaded.read('https://vk.com/b.jpg'), b'b-bytes', "❌ Second process entry lost")
+        print("✅ test_processes_merge_their_entries: Both indexes merged on save.")
+
+    def test_eviction_keeps_blobs_of_other_processes(self):
+        photo_cache.BLOB_GRACE = 0
+        try:
+            other = PhotoCache(self.directory)
+            other.store('https://vk.com/shared.jpg', b'123456')
+            other.save()
+
+            cache = PhotoCache(self.directory, max_bytes=10)
+            cache.store('https://vk.com/own.jpg', b'abcdefgh')  # evicts shared.jpg from this index
+            self.assertIsNone(cache.cached_path('https://vk.com/shared.jpg'), "❌ LRU entry should be evicted")
+            other.store('https://vk.com/shared-copy.jpg', b'123456')
+            other.save()  # the other process still references the blob
+            cache.save()
+            self.assertEqual(other.read('https://vk.com/shared-copy.jpg'), b'123456',
+                             "❌ Blob used by another process was deleted")
+
+            unlimited = PhotoCache(self.directory)
+            old_hash = unlimited.store('https://vk.com/replaced.jpg', b'xyz')
+            unlimited.store('https://vk.com/replaced.jpg', b'xyz-2')
+            unlimited.save()
+            blobs = os.listdir(os.path.join(self.directory, 'blobs'))
+            self.assertNotIn(old_hash + '.jpg', blobs, "❌ Orphaned blob should be removed on save")
+            self.assertEqual(unlimited.read('https://vk.com/replaced.jpg'), b'xyz-2', "❌ New blob should stay")
+        finally:
+            photo_cache.BLOB_GRACE = original_grace
+        print("✅ test_eviction_keeps_blobs_of_other_processes: Only orphaned blobs removed.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from photo_fetcher import PhotoFetcher
+
+class FakeResponse:
+    def __init__(self, status_code, content=b'', content_type='image/jpeg'):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {'content-type': content_type}
+
+class SlowClient:
+    """Answers after a delay and tracks how many requests run at once per host."""
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active = {}
+        self.max_active = {}
+
+    def get(self, url, headers=None):
+        host = url.split('/')[2]
+        with self.lock:
+            self.active[host] = self.active.get(host, 0) + 1
+            self.max_active[host] = max(self.max_active.get(host, 0), self.active[host])
+        time.sleep(self.delay)
+        with self.lock:
+            self.active[host] -= 1
+        if url.endswith('.html'):
+            return FakeResponse(200, b'<html>', 'text/html')
+        return FakeResponse(200, url.encode())
+
+class TestPhotoFetcher(unittest.TestCase):
+
+    def test_parallel_download_with_host_limit(self):
+        client = SlowClient()
+        fetcher = PhotoFetcher(client, max_workers=8, per_host=2, use_cache=False)
+        urls = [f"https://sun{i % 2}.userapi.com/{i}.jpg" for i in range(8)]
+
+        started = time.monotonic()
+        photos = fetcher.fetch(urls)
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(photos, {url: url.encode() for url in urls}, "❌ Photos should be keyed by URL")
+        self.assertTrue(all(count <= 2 for count in client.max_active.values()), "❌ Per-host limit exceeded")
+        self.assertLess(elapsed, 8 * client.delay, "❌ Downloads should run concurrently")
+        self.assertEqual(fetcher.last_stats['downloaded'], 8)
+        print(f"✅ test_parallel_download_with_host_limit: 8 photos in {elapsed:.2f}s.")
+
+    def test_non_image_rejected(self):
+        fetcher = PhotoFetcher(SlowClient(delay=0), use_cache=False)
+        photos = fetcher.fetch(['https://vk.com/page.html', 'https://vk.com/page.html'])
+        self.assertEqual(photos, {'https://vk.com/page.html': None}, "❌ Non-image should give None")
+        self.assertEqual(fetcher.last_stats['failed'], 1)
+        print("✅ test_non_image_rejected: Content type validated.")
+
+if __name__ == '__main__':
+    unittest.main()
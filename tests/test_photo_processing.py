@@ -0,0 +1,41 @@
+import unittest
+import sys
+import os
+import io
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from photo_processing import make_thumbnail, Image
+
+def make_jpeg(width=200, height=200):
+    image = Image.new('RGB', (width, height))
+    for x in range(width):
+        for y in range(height):
+            image.putpixel((x, y), ((x * 7) % 256, (y * 5) % 256, (x * y) % 256))
+    output = io.BytesIO()
+    image.save(output, 'JPEG', quality=95)
+    return output.getvalue()
+
+class TestPhotoProcessing(unittest.TestCase):
+
+    def setUp(self):
+        if Image is None:
+            self.skipTest("⚠️ Pillow is not installed.")
+
+    def test_thumbnail_is_smaller(self):
+        original = make_jpeg(200, 150)
+        for fmt, content_type in (('WEBP', 'image/webp'), ('JPEG', 'image/jpeg')):
+            thumbnail, result_type = make_thumbnail(original, 'image/jpeg', size=100, fmt=fmt)
+            self.assertLess(len(thumbnail), len(original), f"❌ {fmt} thumbnail should be smaller")
+            self.assertEqual(result_type, content_type, f"❌ Wrong content type for {fmt}")
+            with Image.open(io.BytesIO(thumbnail)) as image:
+                self.assertEqual(image.size, (100, 100), "❌ Thumbnail should be square 100px")
+        print("✅ test_thumbnail_is_smaller: Thumbnails re-encoded.")
+
+    def test_broken_image_returned_as_is(self):
+        content, content_type = make_thumbnail(b'not an image', 'image/jpeg')
+        self.assertEqual((content, content_type), (b'not an image', 'image/jpeg'), "❌ Original should be kept")
+        print("✅ test_broken_image_returned_as_is: Original kept.")
+
+if __name__ == '__main__':
+    unittest.main()
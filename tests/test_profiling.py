@@ -0,0 +1,47 @@
+import unittest
+import sys
+import os
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from profiling import phase_of, profile_call
+
+def generate_birthday_calendar(users):
+    # Same name as the real generator, so the sampler puts it into the calendar phase
+    deadline = time.perf_counter() + 0.1
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+    return len(users)
+
+class TestProfiling(unittest.TestCase):
+
+    def test_phase_of(self):
+        self.assertEqual(phase_of([('main', 'main'), ('html_generator', 'generate_birthday_calendar')]), 'calendar',
+                         "❌ Calendar phase not detected")
+        self.assertEqual(phase_of([('main', 'collect_users'), ('vk_api', 'call'), ('db_writer', 'put')]), 'db',
+                         "❌ DB should win over collection")
+        self.assertEqual(phase_of([('main', 'collect_users'), ('vk_api', 'call')]), 'collection',
+                         "❌ Collection phase not detected")
+        self.assertEqual(phase_of([('main', 'main')]), 'other', "❌ Unknown stack should be 'other'")
+        print("✅ test_phase_of: Phases detected.")
+
+    def test_profile_writes_dumps(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output = os.path.join(tmp_dir, 'run')
+            result = profile_call(generate_birthday_calendar, [1, 2, 3], output=output, interval=0.001)
+
+            self.assertEqual(result, 3, "❌ Result of the profiled function should be returned")
+            self.assertTrue(os.path.getsize(output + '.pstats') > 0, "❌ cProfile dump not written")
+            with open(output + '.collapsed', encoding='utf-8') as f:
+                lines = [line for line in f.read().splitlines() if line]
+        self.assertTrue(lines, "❌ Collapsed stacks not written")
+        stack, count = lines[0].rsplit(' ', 1)
+        self.assertTrue(count.isdigit() and ';' in stack, "❌ Collapsed line should be 'a;b;c count'")
+        self.assertTrue(any('test_profiling:generate_birthday_calendar' in line for line in lines),
+                        "❌ Profiled function should appear in sampled stacks")
+        print(f"✅ test_profile_writes_dumps: {len(lines)} collapsed stacks.")
+
+if __name__ == '__main__':
+    unittest.main()
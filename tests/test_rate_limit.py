@@ -0,0 +1,72 @@
+import unittest
+import sys
+import os
+import time
+import asyncio
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from rate_limit import TokenBucket, RateLimitManager, is_throttled, backoff_delay, BACKOFF_MAX
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_without_wait(self):
+        bucket = TokenBucket(rate=5, capacity=3)
+        delays = [bucket.reserve() for _ in range(3)]
+        self.assertEqual(delays, [0.0, 0.0, 0.0], "❌ Burst within capacity should not wait")
+        self.assertGreater(bucket.reserve(), 0, "❌ Request over capacity should wait")
+        print("✅ test_burst_without_wait: Burst handled correctly.")
+
+    def test_rate_is_respected(self):
+        bucket = TokenBucket(rate=20, capacity=1)
+        start = time.monotonic()
+        for _ in range(5):
+            bucket.acquire()
+        elapsed = time.monotonic() - start
+        self.assertGreaterEqual(elapsed, 0.19, f"❌ 5 requests at 20 rps took only {elapsed:.3f}s")
+        print(f"✅ test_rate_is_respected: 5 requests took {elapsed:.3f}s.")
+
+    def test_async_acquire(self):
+        bucket = TokenBucket(rate=20, capacity=1)
+
+        async def run():
+            start = time.monotonic()
+            await asyncio.gather(*(bucket.acquire_async() for _ in range(5)))
+            return time.monotonic() - start
+
+        elapsed = asyncio.run(run())
+        self.assertGreaterEqual(elapsed, 0.19, f"❌ 5 async requests at 20 rps took only {elapsed:.3f}s")
+        print(f"✅ test_async_acquire: 5 concurrent requests took {elapsed:.3f}s.")
+
+class TestRateLimitManager(unittest.TestCase):
+
+    def test_tokens_are_spread(self):
+        manager = RateLimitManager(['token_a', 'token_b'], rate=1)
+        used = {manager.acquire(), manager.acquire()}
+        self.assertEqual(used, {'token_a', 'token_b'}, "❌ Both tokens should be used before waiting")
+        print("✅ test_tokens_are_spread: Load spread over tokens.")
+
+    def test_backoff_skips_throttled_token(self):
+        manager = RateLimitManager(['token_a', 'token_b'], rate=10)
+        delay = manager.backoff('token_a', 3)
+        self.assertLessEqual(delay, BACKOFF_MAX, "❌ Backoff should be capped")
+        manager.backoff('token_a', 10)
+        self.assertEqual(manager.acquire(), 'token_b', "❌ Throttled token should not be used")
+        print("✅ test_backoff_skips_throttled_token: Throttled token paused.")
+
+    def test_is_throttled(self):
+        self.assertTrue(is_throttled({'error': {'error_code': 6, 'error_msg': 'Too many requests per second'}}))
+        self.assertTrue(is_throttled({'error': {'error_code': 10, 'error_msg': 'Internal server error'}}))
+        self.assertFalse(is_throttled({'error': {'error_code': 15, 'error_msg': 'Access denied'}}))
+        self.assertFalse(is_throttled({'response': []}))
+        print("✅ test_is_throttled: Throttling errors recognised.")
+
+    def test_backoff_delay_bounds(self):
+        for attempt in range(10):
+            delay = backoff_delay(attempt)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(BACKOFF_MAX, 0.5 * 2 ** attempt))
+        print("✅ test_backoff_delay_bounds: Backoff within limits.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import sys
+import os
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from refresh_jobs import RefreshJobs
+
+class TestRefreshJobs(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.progressed = threading.Event()
+        self.runs = 0
+
+    def run_job(self, job):
+        self.runs += 1
+        job.total = 10
+        job.advance(4, api_calls=2, errors=1)
+        self.progressed.set()
+        self.release.wait(5)
+        job.advance(10, api_calls=3)
+        return "Collected 10 users"
+
+    def wait_finished(self, jobs, job):
+        jobs.executor.submit(lambda: None).result(5)
+        self.assertFalse(job.active, "❌ Job should be finished")
+
+    def test_progress_and_result(self):
+        jobs = RefreshJobs(self.run_job)
+        job, started = jobs.submit()
+        self.assertTrue(started, "❌ First request should start a job")
+
+        self.assertTrue(self.progressed.wait(5), "❌ Job should report progress")
+        progress = jobs.get(job.id).to_dict()
+        self.assertEqual((progress['status'], progress['done'], progress['total']), ('running', 4, 10),
+                         "❌ Progress should be visible while running")
+        self.assertEqual((progress['api_calls'], progress['errors']), (2, 1), "❌ API calls and errors should be reported")
+        self.assertIsNotNone(progress['eta'], "❌ ETA should be estimated")
+
+        self.release.set()
+        self.wait_finished(jobs, job)
+        self.assertEqual(job.to_dict()['status'], 'done', "❌ Job should be done")
+        self.assertEqual(job.message, "Collected 10 users", "❌ Final message should be kept")
+        print("✅ test_progress_and_result: Progress reported until done.")
+
+    def test_requests_coalesce_into_active_job(self):
+        jobs = RefreshJobs(self.run_job)
+        first, _ = jobs.submit()
+        joined = [jobs.submit() for _ in range(5)]
+        self.assertTrue(all(job is first and not started for job, started in joined),
+                        "❌ Requests during a job should join it")
+
+        self.release.set()
+        self.wait_finished(jobs, first)
+        second, started = jobs.submit()
+        self.assertTrue(started and second is not first, "❌ New job should start after the previous one finished")
+        self.wait_finished(jobs, second)
+        self.assertEqual(self.runs, 2, "❌ Only two collections should run")
+        print("✅ test_requests_coalesce_into_active_job: 7 requests -> 2 collections.")
+
+    def test_failed_job(self):
+        def fail(job):
+            raise RuntimeError("VK is down")
+
+        jobs = RefreshJobs(fail)
+        job, _ = jobs.submit()
+        self.wait_finished(jobs, job)
+        self.assertEqual((job.status, job.message), ('error', 'VK is down'), "❌ Error should be reported")
+        print("✅ test_failed_job: Error reported.")
+
+if __name__ == '__main__':
+    unittest.main()
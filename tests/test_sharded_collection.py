@@ -0,0 +1,68 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from counters_cache import CountersCache
+from sharded_collection import shard_pairs, plan_tokens, collect_sharded
+from vk_api import CHUNK_SIZE
+from tests.fake_vk_server import FakeVKServer
+
+class TestShardedCollection(unittest.TestCase):
+
+    def test_shards_keep_order_and_whole_chunks(self):
+        pairs = [(i, i) for i in range(1000)]
+        shards = shard_pairs(pairs, 4)
+        self.assertEqual([pair for shard in shards for pair in shard], pairs, "❌ Shards should keep all pairs in order")
+        self.assertTrue(all(len(shard) % CHUNK_SIZE == 0 for shard in shards[:-1]),
+                        "❌ Shards should consist of whole users.get chunks")
+        self.assertLessEqual(len(shards), 4, "❌ Too many shards")
+        self.assertEqual(len(shard_pairs(pairs[:10], 4)), 1, "❌ Small list should not be split")
+        print(f"✅ test_shards_keep_order_and_whole_chunks: {[len(shard) for shard in shards]}")
+
+    def test_token_plan_never_exceeds_token_rate(self):
+        plan = plan_tokens(['t1', 't2', 't3', 't4'], 2, rps=3)
+        self.assertEqual(plan, [(['t1', 't3'], 3), (['t2', 't4'], 3)], "❌ Tokens should be split between workers")
+
+        plan = plan_tokens(['t1', 't2'], 3, rps=3)
+        per_token = {}
+        for tokens, rps in plan:
+            for token in tokens:
+                per_token[token] = per_token.get(token, 0) + rps
+        self.assertEqual(per_token, {'t1': 3, 't2': 3}, "❌ Shared tokens should split their rate")
+        print("✅ test_token_plan_never_exceeds_token_rate: Quota coordinated.")
+
+    def test_collect_in_worker_processes(self):
+        server = FakeVKServer(closed_ratio=0.2).start()
+        try:
+            cache = CountersCache(path=None)
+            pairs = [(i, i) for i in range(1, 301)]
+            users, collected = collect_sharded(
+                pairs, cache, workers=2, tokens=['fake1', 'fake2'], rps=1000, api_url=server.api_url
+            )
+        finally:
+            server.stop()
+
+        self.assertEqual(collected, 300, "❌ All users should be collected")
+        self.assertEqual([user['id'] for user in users], list(range(1, 301)), "❌ Results should be merged in order")
+        self.assertEqual(len(cache.entries), 300, "❌ Workers' counters should be merged into the cache")
+        print(f"✅ test_collect_in_worker_processes: {collected} users in {server.requests_total()} requests.")
+
+    def test_async_workers_use_api_url(self):
+        server = FakeVKServer().start()
+        try:
+            pairs = [(i, i) for i in range(1, 301)]
+            users, collected = collect_sharded(
+                pairs, CountersCache(path=None), workers=2, use_async=True, tokens=['fake1', 'fake2'], rps=1000,
+                api_url=server.api_url
+            )
+        finally:
+            server.stop()
+
+        self.assertEqual(collected, 300, "❌ Async workers should collect from api_url")
+        self.assertGreater(server.calls['users.get'], 0, "❌ Requests should go to api_url")
+        print(f"✅ test_async_workers_use_api_url: {collected} users from the fake server.")
+
+if __name__ == '__main__':
+    unittest.main()
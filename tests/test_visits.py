@@ -0,0 +1,60 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from datetime import datetime, timedelta
+from visits import to_sessions, filter_range, downsample, as_timestamp
+
+class TestVisits(unittest.TestCase):
+
+    def test_sessions_from_dict_points(self):
+        points = [{'timestamp': t, 'online': 1 if 3 <= t < 9 else 0, 'platform': 7} for t in range(12)]
+        sessions = to_sessions(points)
+
+        self.assertEqual([(s['start'], s['end'], s['online']) for s in sessions], [(0, 2, 0), (3, 8, 1), (9, 11, 0)],
+                         "❌ Runs of equal state should become one interval")
+        self.assertEqual(sum(s['points'] for s in sessions), len(points), "❌ Every point should be counted")
+        self.assertEqual(sessions[1]['platform'], 7, "❌ State fields should be kept")
+        print(f"✅ test_sessions_from_dict_points: {len(points)} points -> {len(sessions)} sessions.")
+
+    def test_sessions_from_sequence_points(self):
+        sessions = to_sessions([[1, True], [2, True], [3, False]])
+        self.assertEqual(sessions, [{'start': 1, 'end': 2, 'points': 2, 'state': [True]},
+                                    {'start': 3, 'end': 3, 'points': 1, 'state': [False]}],
+                         "❌ Sequence points should be encoded by their first item as time")
+        self.assertEqual(to_sessions([]), [], "❌ Empty history should give no sessions")
+        print("✅ test_sessions_from_sequence_points: Sequence points encoded.")
+
+    def test_missing_time_field(self):
+        with self.assertRaises(ValueError, msg="❌ Point without time should be rejected"):
+            to_sessions([{'online': 1}])
+        print("✅ test_missing_time_field: Error raised.")
+
+    def test_filter_range(self):
+        start = datetime(2026, 1, 1)
+        points = [{'timestamp': start + timedelta(minutes=i), 'online': 1} for i in range(120)]
+        window = filter_range(points, as_timestamp('2026-01-01T00:30:00'), as_timestamp('2026-01-01T00:59:00'))
+        self.assertEqual(len(window), 30, "❌ Only points inside the window should be returned")
+        self.assertEqual(filter_range(points), points, "❌ No bounds should return everything")
+        self.assertEqual(as_timestamp('Thu, 01 Jan 2026 10:00:00 GMT'), as_timestamp('2026-01-01T10:00:00Z'),
+                         "❌ RFC 1123 and ISO times should match")
+        print("✅ test_filter_range: Window selected.")
+
+    def test_downsample_keeps_state_changes(self):
+        # online for 5 minutes every hour, polled every minute for 10 days
+        points = [{'timestamp': t * 60, 'online': int(t % 60 < 5)} for t in range(14400)]
+        reduced = downsample(points, 1000)
+        self.assertLessEqual(len(reduced), 1000, "❌ Result should fit max_points")
+        self.assertEqual(to_sessions(reduced)[1]['start'], 5 * 60, "❌ State changes should be kept exactly")
+
+        reduced = downsample(points, 100)
+        self.assertLessEqual(len(reduced), 100, "❌ Result should fit max_points")
+        self.assertTrue(any(point['online'] for point in reduced) and any(not point['online'] for point in reduced),
+                        "❌ Both states should survive bucketing")
+        self.assertEqual(downsample(points[:10], 100), points[:10], "❌ Small history should not change")
+        print(f"✅ test_downsample_keeps_state_changes: {len(points)} -> {len(reduced)} points.")
+
+if __name__ == '__main__':
+    unittest.main()
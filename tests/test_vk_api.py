@@ -5,7 +5,11 @@ import os
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from vk_api import get_users_info
+from vk_api import (
+    get_users_info, VKClient, DEFAULT_TIMEOUT, build_counters_code,
+    parse_counters_response, EXECUTE_MAX_CALLS, USERS_PER_EXECUTE
+)
+from tests.fake_vk_server import FakeVKServer
 
 class TestVkApi(unittest.TestCase):
 
@@ -57,5 +61,92 @@ class TestVkApi(unittest.TestCase):
             self.assertIsInstance(user['friends_count'], int, "❌ 'friends_count' should be an integer or None")
         print(f"✅ test_get_users_info_values: Data values are correct for user {user['name']}.")
 
+    def test_client_defaults(self):
+        client = VKClient(tokens=['test_token'], api_version='5.199', timeouts={'wall.get': 3})
+        params = client.default_params(client.limiter.acquire())
+        self.assertEqual(params, {'access_token': 'test_token', 'v': '5.199'}, "❌ Default params are wrong")
+        self.assertEqual(client.timeout_for('users.get'), 10, "❌ users.get timeout should be 10")
+        self.assertEqual(client.timeout_for('wall.get'), 3, "❌ Custom timeout was not applied")
+        self.assertEqual(client.timeout_for('friends.get'), DEFAULT_TIMEOUT, "❌ Default timeout was not used")
+        client.close()
+        print("✅ test_client_defaults: Client defaults are correct.")
+
+    def test_build_counters_code(self):
+        vk_ids = list(range(1, USERS_PER_EXECUTE + 1))
+        code = build_counters_code(vk_ids)
+        self.assertTrue(code.startswith('return ['), "❌ Code should return an array")
+        self.assertLessEqual(code.count('API.'), EXECUTE_MAX_CALLS, "❌ Too many API calls in one execute")
+        self.assertIn('API.wall.get({"owner_id": 1, "count": 0})', code, "❌ wall.get call is missing")
+        print("✅ test_build_counters_code: VKScript code is correct.")
+
+    def test_parse_counters_response(self):
+        data = {
+            'response': [
+                [{'count': 10, 'items': []}, {'count': 5, 'items': []},
+                 {'users': {'count': 3, 'items': []}, 'groups': {'count': 7, 'items': []}},
+                 {'count': 2, 'items': []}, {'count': 42, 'items': []}],
+                [False, False, {'users': {'count': 1, 'items': []}}, False, False]
+            ],
+            'execute_errors': [
+                {'method': 'friends.get', 'error_code': 30, 'error_msg': 'This profile is private'},
+                {'method': 'users.getFollowers', 'error_code': 30, 'error_msg': 'This profile is private'},
+                {'method': 'groups.get', 'error_code': 15, 'error_msg': 'Access denied'},
+                {'method': 'wall.get', 'error_code': 15, 'error_msg': 'Access denied'}
+            ]
+        }
+        counters = parse_counters_response([1, 2], data)
+        self.assertEqual(counters[1], {
+            'friends_count': 10, 'followers_count': 5, 'subscriptions_count': 3,
+            'groups_count': 2, 'wall_count': 42
+        }, "❌ Counters for open profile do not match")
+        self.assertEqual(counters[2], {
+            'friends_count': None, 'followers_count': None, 'subscriptions_count': 1,
+            'groups_count': None, 'wall_count': None
+        }, "❌ Closed profile counters should be None")
+
+        failed = parse_counters_response([3], {'error': {'error_code': 6, 'error_msg': 'Too many requests'}})
+        self.assertTrue(all(value is None for value in failed[3].values()), "❌ Failed execute should give None")
+        print("✅ test_parse_counters_response: Counters mapped correctly.")
+
+class TestVkApiFakeServer(unittest.TestCase):
+    """get_users_info against the local fake VK API (no token or network needed)."""
+
+    def collect(self, server, count):
+        client = VKClient(tokens=['fake_token'], api_url=server.api_url, rps=1000)
+        try:
+            return get_users_info([(i, i) for i in range(1, count + 1)], client=client)
+        finally:
+            client.close()
+
+    def test_collection_with_closed_profiles(self):
+        server = FakeVKServer(closed_ratio=0.3).start()
+        try:
+            users = self.collect(server, 120)
+        finally:
+            server.stop()
+
+        self.assertEqual([user['id'] for user in users], list(range(1, 121)), "❌ All users should be returned in order")
+        for user in users:
+            if server.is_closed(user['id']):
+                self.assertIsNone(user['friends_count'], "❌ Closed profile counters should be None")
+                self.assertIsNone(user['wall_count'], "❌ Closed profile counters should be None")
+            else:
+                self.assertEqual(user['friends_count'], user['id'] % 500, "❌ friends_count does not match")
+                self.assertEqual(user['subscriptions_count'], user['id'] % 40, "❌ subscriptions_count does not match")
+        # 2 users.get + 24 execute requests instead of 6 requests per user
+        self.assertEqual(server.requests_total(), 26, "❌ Unexpected number of HTTP requests")
+        print(f"✅ test_collection_with_closed_profiles: {len(users)} users in {server.requests_total()} requests.")
+
+    def test_rate_limit_errors_are_retried(self):
+        server = FakeVKServer(error6_ratio=0.3).start()
+        try:
+            users = self.collect(server, 30)
+        finally:
+            server.stop()
+
+        self.assertEqual(len(users), 30, "❌ Users should not be lost on error 6")
+        self.assertTrue(all(user['friends_count'] is not None for user in users), "❌ Counters lost on error 6")
+        print(f"✅ test_rate_limit_errors_are_retried: {server.requests_total()} requests for 30 users.")
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import vk_api_async
+from vk_api import VKClient, get_users_info
+from vk_api_async import get_users_info_concurrent
+from counters_cache import CountersCache
+from config import COUNTER_TTLS
+from tests.fake_vk_server import FakeVKServer
+
+class TestVkApiAsync(unittest.TestCase):
+    """get_users_info_concurrent against the local fake VK API (no token or network needed)."""
+
+    def setUp(self):
+        self.original_url = vk_api_async.API_URL
+
+    def tearDown(self):
+        vk_api_async.API_URL = self.original_url
+
+    def collect_both(self, server, pairs):
+        client = VKClient(tokens=['fake_token'], api_url=server.api_url, rps=1000)
+        try:
+            sync_users = get_users_info(pairs, client=client)
+        finally:
+            client.close()
+        vk_api_async.API_URL = server.api_url
+        async_users = get_users_info_concurrent(pairs, rps=1000, tokens=['fake_token'])
+        return sync_users, async_users
+
+    def test_same_users_as_sync_engine(self):
+        server = FakeVKServer(closed_ratio=0.3).start()
+        try:
+            # Shuffled ids over three users.get chunks
+            pairs = [(db_id, vk_id) for db_id, vk_id in enumerate(range(250, 0, -1), start=1)]
+            sync_users, async_users = self.collect_both(server, pairs)
+        finally:
+            server.stop()
+
+        self.assertEqual([user['id'] for user in async_users], list(range(250, 0, -1)),
+                         "❌ Users should be returned in input order")
+        self.assertEqual(async_users, sync_users, "❌ Async engine should return the same users as the sync one")
+        print(f"✅ test_same_users_as_sync_engine: {len(async_users)} users match.")
+
+    def test_rate_limit_errors_are_retried(self):
+        server = FakeVKServer(error6_ratio=0.3).start()
+        try:
+            vk_api_async.API_URL = server.api_url
+            users = get_users_info_concurrent([(i, i) for i in range(1, 31)], rps=1000, tokens=['fake_token'])
+        finally:
+            server.stop()
+
+        self.assertEqual([user['id'] for user in users], list(range(1, 31)), "❌ Users should not be lost on error 6")
+        self.assertTrue(all(user['friends_count'] is not None for user in users), "❌ Counters lost on error 6")
+        print(f"✅ test_rate_limit_errors_are_retried: {server.requests_total()} requests for 30 users.")
+
+    def test_refresh_counters_false_uses_cache(self):
+        server = FakeVKServer().start()
+        try:
+            vk_api_async.API_URL = server.api_url
+            pairs = [(i, i) for i in range(1, 51)]
+            cache = CountersCache(path=None, ttls={field: 0 for field in COUNTER_TTLS})  # always expired
+            get_users_info_concurrent(pairs, rps=1000, tokens=['fake_token'], counters_cache=cache)
+            executes = server.calls['execute']
+
+            users = get_users_info_concurrent(pairs, rps=1000, tokens=['fake_token'], counters_cache=cache,
+                                              refresh_counters=False)
+            self.assertEqual(server.calls['execute'], executes, "❌ Cached users should not get counter requests")
+            self.assertEqual(users[0]['friends_count'], 1, "❌ Counters should come from the cache")
+
+            get_users_info_concurrent(pairs, rps=1000, tokens=['fake_token'], counters_cache=cache)
+            self.assertGreater(server.calls['execute'], executes, "❌ Expired counters should be requested")
+        finally:
+            server.stop()
+        print("✅ test_refresh_counters_false_uses_cache: TTL check skipped for cached users.")
+
+if __name__ == '__main__':
+    unittest.main()
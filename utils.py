@@ -1,7 +1,14 @@
 # utils.py
+import logging
 import webbrowser
 import os
-from config import OUTPUT_HTML
+import sys
+from config import OUTPUT_HTML, LOG_LEVEL
+
+def setup_logging(level=LOG_LEVEL):
+    """Leveled logging for hot paths (per user / per request messages are DEBUG).
+    Messages go to stdout next to the regular print output."""
+    logging.basicConfig(level=level, format='%(message)s', stream=sys.stdout)
 
 def open_in_browser():
     """open in browser."""
@@ -0,0 +1,115 @@
+# visits.py
+"""Helpers for visit history returned by database.load_user_visits_for_chart.
+
+Points are either dicts (one of TIME_KEYS holds the poll time, the other keys
+are the observed state, e.g. online / platform) or sequences whose first item
+is the time. Nothing else about their shape is assumed.
+"""
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+TIME_KEYS = ('timestamp', 'time', 'checked_at', 'created_at', 'date', 'x')
+
+def time_key(point):
+    """Name of the time field of a dict point (None for sequence points)."""
+    if isinstance(point, dict):
+        for key in TIME_KEYS:
+            if key in point:
+                return key
+        raise ValueError(f"Visit point has no time field (expected one of {TIME_KEYS})")
+    return None
+
+def split_point(point, key=None):
+    """Returns (time, state) of one point; state is comparable between points."""
+    if isinstance(point, dict):
+        key = key or time_key(point)
+        return point[key], tuple(sorted((k, v) for k, v in point.items() if k != key))
+    return point[0], tuple(point[1:])
+
+def to_sessions(points):
+    """Run-length encodes visit points into intervals.
+    Consecutive points with the same state (online, platform, ...) become one
+    {'start', 'end', 'points', **state} dict; 'end' is the last poll that saw
+    the state, so gaps in polling are not painted as online time.
+    Sequence points give {'start', 'end', 'points', 'state': [...]}."""
+    sessions = []
+    key = time_key(points[0]) if points else None
+    current_state = object()
+    for point in points:
+        point_time, state = split_point(point, key)
+        if sessions and state == current_state:
+            sessions[-1]['end'] = point_time
+            sessions[-1]['points'] += 1
+            continue
+        current_state = state
+        session = {'start': point_time, 'end': point_time, 'points': 1}
+        if key is None:
+            session['state'] = list(state)
+        else:
+            session.update(state)
+        sessions.append(session)
+    return sessions
+
+def as_timestamp(value):
+    """Poll time as epoch seconds. Accepts numbers, datetimes and ISO strings."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            return float(text)
+        except ValueError:
+            pass
+        try:
+            return datetime.fromisoformat(text.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            return parsedate_to_datetime(text).timestamp()  # RFC 1123, as jsonify writes datetimes
+    raise ValueError(f"Unsupported time value: {value!r}")
+
+def filter_range(points, start=None, end=None):
+    """Points with start <= time <= end (epoch seconds, None - unbounded)."""
+    if not points or (start is None and end is None):
+        return points
+    key = time_key(points[0])
+    selected = []
+    for point in points:
+        point_time = as_timestamp(split_point(point, key)[0])
+        if (start is None or point_time >= start) and (end is None or point_time <= end):
+            selected.append(point)
+    return selected
+
+def downsample(points, max_points):
+    """Reduces points to at most max_points for a step chart of states.
+
+    1. Only the first and last point of every run of equal state are kept;
+       for a step chart this loses nothing.
+    2. If that is still too much, time is cut into max_points // 2 buckets and
+       each bucket keeps its first point and the first point in a different
+       state (the categorical version of bucketed min/max), so short online
+       visits stay visible at any zoom level.
+    """
+    if not max_points or len(points) <= max_points:
+        return points
+    key = time_key(points[0])
+    states = [split_point(point, key) for point in points]
+
+    boundaries = [i for i in range(len(points))
+                  if i == 0 or i == len(points) - 1
+                  or states[i][1] != states[i - 1][1] or states[i][1] != states[i + 1][1]]
+    if len(boundaries) <= max_points:
+        return [points[i] for i in boundaries]
+
+    buckets = max(1, max_points // 2)
+    first_time = as_timestamp(states[boundaries[0]][0])
+    span = (as_timestamp(states[boundaries[-1]][0]) - first_time) or 1
+    kept = {}
+    for i in boundaries:
+        bucket = min(buckets - 1, int((as_timestamp(states[i][0]) - first_time) / span * buckets))
+        first, other = kept.get(bucket, (None, None))
+        if first is None:
+            kept[bucket] = (i, None)
+        elif other is None and states[i][1] != states[first][1]:
+            kept[bucket] = (first, i)
+    return [points[i] for bucket in sorted(kept) for i in kept[bucket] if i is not None]
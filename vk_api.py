@@ -1,234 +1,366 @@
 # vk_api.py
+import json
+import logging
 import requests
-import time
 from datetime import datetime
-from config import VK_ACCESS_TOKEN, API_VERSION, APP_MODE
-from database import save_to_db
+from requests.adapters import HTTPAdapter
+from config import (
+    VK_ACCESS_TOKENS, API_VERSION, APP_MODE, VK_API_URL,
+    VK_POOL_SIZE, VK_RPS, VK_MAX_RETRIES
+)
+from db_writer import DBWriter
+from photo_cache import get_photo_cache
+from rate_limit import RateLimitManager, is_throttled
+from metrics import metrics, vk_result
 
-def get_users_info(vk_id_pairs):
-    Requests basic information and additional counters."""
-    if not VK_ACCESS_TOKEN or VK_ACCESS_TOKEN.strip() == '' or VK_ACCESS_TOKEN == 'your_token_here':
+logger = logging.getLogger(__name__)
+
+API_URL = VK_API_URL
+USER_FIELDS = 'online,photo_200,last_seen,city,bdate,relation,counters,domain'
+DEFAULT_PHOTO = 'https://vk.com/images/camera_200.png'
+CHUNK_SIZE = 95  # users per one users.get request
+
+# --- Timeouts (seconds) per API method ---
+DEFAULT_TIMEOUT = 5
+PHOTO_TIMEOUT = 5
+METHOD_TIMEOUTS = {
+    'users.get': 10,
+    'execute': 15,
+}
+
+class VKClient:
+    """Reusable VK API client.
+    Keeps a pooled requests.Session, so repeated calls reuse open connections
+    instead of paying a new TCP+TLS handshake every time.
+    Requests are spread over the token pool and retried on rate limit errors."""
+
+    def __init__(self, tokens=None, api_version=API_VERSION, pool_size=VK_POOL_SIZE,
+                 timeouts=None, rps=VK_RPS, max_retries=VK_MAX_RETRIES, api_url=None):
+        self.api_url = api_url or API_URL
+        self.api_version = api_version
+        self.limiter = RateLimitManager(tokens or VK_ACCESS_TOKENS, rps, max_retries)
+        self.timeouts = dict(METHOD_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+        self.requests = 0  # HTTP requests to the API, retries included
+        self.errors = 0  # calls that finally returned an error
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def timeout_for(self, method):
+        return self.timeouts.get(method, DEFAULT_TIMEOUT)
+
+    def default_params(self, token):
+        return {'access_token': token, 'v': self.api_version}
+
+    def call(self, method, **params):
+        """Calls VK API method.
+        Returns decoded JSON (dict with 'response' or 'error' key)."""
+        for attempt in range(self.limiter.max_retries + 1):
+            token = self.limiter.acquire()
+            request_params = self.default_params(token)
+            request_params.update(params)
+            self.requests += 1
+            with metrics.timer('vk_api_request_seconds', method=method, result='ok') as timer:
+                try:
+                    response = self.session.get(self.api_url + method, params=request_params,
+                                                timeout=self.timeout_for(method))
+                except requests.exceptions.Timeout:
+                    timer.labels['result'] = 'timeout'
+                    raise
+                data = response.json()
+                timer.labels['result'] = vk_result(data)
+
+            if not is_throttled(data) or attempt == self.limiter.max_retries:
+                if 'error' in data:
+                    self.errors += 1
+                return data
+
+            delay = self.limiter.backoff(token, attempt)
+            logger.warning(f" ⏳ {method}: {data['error'].get('error_msg')} (Error {data['error']['error_code']}), "
+                           f"retry {attempt + 1}/{self.limiter.max_retries} in {delay:.1f}s")
+
+    def get(self, url, timeout=PHOTO_TIMEOUT, headers=None):
+        """Plain GET through the same pool (photos, CDN). Token is not attached."""
+        return self.session.get(url, timeout=timeout, headers=headers)
+
+    def close(self):
+        self.session.close()
+
+def token_is_set(token):
+    return bool(token) and token.strip() != '' and token not in ('your_token_here', 'token')
+
+_client = None
+
+def get_client():
+    """Returns shared VKClient instance (created on first use)."""
+    global _client
+    if _client is None:
+        _client = VKClient()
+    return _client
+
+# --- Counters requested per user, packed into VK `execute` ---
+# (field in full_user, API method, id parameter, extra parameters)
+COUNTER_CALLS = [
+    ('friends_count', 'friends.get', 'user_id', {'count': 0, 'offset': 0}),
+    ('followers_count', 'users.getFollowers', 'user_id', {'count': 0, 'offset': 0}),
+    ('subscriptions_count', 'users.getSubscriptions', 'user_id', {'count': 0, 'extended': 0}),
+    ('groups_count', 'groups.get', 'user_id', {'count': 0, 'extended': 0}),
+    ('wall_count', 'wall.get', 'owner_id', {'count': 0}),
+]
+COUNTER_FIELDS = [field for field, _, _, _ in COUNTER_CALLS]
+COUNTER_CALL_BY_FIELD = {call[0]: call for call in COUNTER_CALLS}
+EXECUTE_MAX_CALLS = 25  # VK limit of API calls inside one execute
+USERS_PER_EXECUTE = EXECUTE_MAX_CALLS // len(COUNTER_CALLS)
+# Error codes: 15 - Access denied, 30 - Profile private/closed
+CLOSED_PROFILE_ERRORS = (15, 30)
+
+def _fields_for(vk_id, fields_by_id):
+    if fields_by_id is None:
+        return COUNTER_FIELDS
+    return fields_by_id.get(vk_id, [])
+
+def build_counters_code(vk_ids, fields_by_id=None):
+    """Builds VKScript code that returns counter responses for every user:
+    [[friends, followers, subscriptions, groups, wall], ...]
+    fields_by_id ({vk_id: [field, ...]}) limits the calls made for a user."""
+    users_code = []
+    for vk_id in vk_ids:
+        calls = []
+        for field in _fields_for(vk_id, fields_by_id):
+            _, method, id_param, extra = COUNTER_CALL_BY_FIELD[field]
+            params = {id_param: vk_id}
+            params.update(extra)
+            calls.append(f"API.{method}({json.dumps(params)})")
+        users_code.append('[' + ','.join(calls) + ']')
+    return 'return [' + ','.join(users_code) + '];'
+
+def pack_counter_batches(vk_ids, fields_by_id=None):
+    """Splits users into execute batches of at most EXECUTE_MAX_CALLS calls."""
+    batches = []
+    batch = []
+    batch_calls = 0
+    for vk_id in vk_ids:
+        calls = len(_fields_for(vk_id, fields_by_id))
+        if not calls:
+            continue
+        if batch and batch_calls + calls > EXECUTE_MAX_CALLS:
+            batches.append(batch)
+            batch = []
+            batch_calls = 0
+        batch.append(vk_id)
+        batch_calls += calls
+    if batch:
+        batches.append(batch)
+    return batches
+
+def empty_counters():
+    return {field: None for field in COUNTER_FIELDS}
+
+def _counter_value(field, result):
+    if not isinstance(result, dict):
+        return None
+    if field == 'subscriptions_count' and 'users' in result:
+        return result['users'].get('count')
+    return result.get('count')
+
+def _report_counter_error(method, vk_id, error):
+    error_code = error.get('error_code', 0)
+    metrics.inc('vk_execute_errors_total', method=method, error_code=error_code)
+    if error_code in CLOSED_PROFILE_ERRORS:
+        logger.debug(f" ℹ️ {method}: access denied or profile closed for ID {vk_id} (Error {error_code})")
+    else:
+        logger.warning(f" ⚠️ {method} error for ID {vk_id}: {error.get('error_msg', 'unknown error')}")
+
+def parse_counters_response(vk_ids, data, fields_by_id=None, closed=None):
+    """Maps execute response back to users.
+    Returns {vk_id: {'friends_count': ..., ...}} with the requested fields; failed calls give None.
+    (vk_id, field) pairs that failed with errors 15/30 are added to the `closed` set."""
+    counters = {vk_id: {field: None for field in _fields_for(vk_id, fields_by_id)} for vk_id in vk_ids}
+
+    if 'error' in data:
+        logger.warning(f" ⚠️ execute error: {data['error'].get('error_msg', 'unknown error')}")
+        return counters
+
+    # Failed calls return false; their errors are listed in execution order
+    errors = iter(data.get('execute_errors', []))
+    for vk_id, user_results in zip(vk_ids, data.get('response') or []):
+        for field, result in zip(_fields_for(vk_id, fields_by_id), user_results or []):
+            if result is False or result is None:
+                error = next(errors, {})
+                _report_counter_error(COUNTER_CALL_BY_FIELD[field][1], vk_id, error)
+                if closed is not None and error.get('error_code') in CLOSED_PROFILE_ERRORS:
+                    closed.add((vk_id, field))
+                continue
+            counters[vk_id][field] = _counter_value(field, result)
+    return counters
+
+def get_counters_batch(vk_ids, client=None, fields_by_id=None, closed=None):
+    """Requests friends/followers/subscriptions/groups/wall counters
+    for many users, up to EXECUTE_MAX_CALLS calls per one execute request.
+    See parse_counters_response for fields_by_id and closed."""
+    client = client or get_client()
+    counters = {}
+
+    for batch in pack_counter_batches(vk_ids, fields_by_id):
+        logger.debug(f" 📊 Requesting additional counters for {len(batch)} users (execute)...")
+        data = {}
+        try:
+            data = client.call('execute', code=build_counters_code(batch, fields_by_id))
+        except requests.exceptions.Timeout:
+            logger.warning(f" ⚠️ Timeout execute for IDs {batch}")
+        except Exception as e:
+            logger.warning(f" ⚠️ Exception execute for IDs {batch}: {e}")
+        counters.update(parse_counters_response(batch, data, fields_by_id, closed))
+
+    return counters
+
+def build_full_user(vk_user, user_counters):
+    """Builds full_user dict from users.get item and counters from get_counters_batch."""
+    counters = vk_user.get('counters', {})
+    # Note: followers and subscriptions often NOT included in counters
+    return {
+        'id': vk_user['id'],
+        'name': f"{vk_user.get('first_name', 'First Name')} {vk_user.get('last_name', 'Last Name')}",
+        'online': vk_user.get('online', 0),
+        'photo_200': vk_user.get('photo_200', DEFAULT_PHOTO),
+        'last_seen': vk_user.get('last_seen'),
+        'city': vk_user.get('city', {}).get('title') or None,
+        'bdate': vk_user.get('bdate'),
+        'relation': vk_user.get('relation'),
+        'friends_count': user_counters['friends_count'],
+        'followers_count': user_counters['followers_count'],
+        'subscriptions_count': user_counters['subscriptions_count'],
+        'groups_count': user_counters['groups_count'],
+        'domain': vk_user.get('domain'),
+        'wall_count': user_counters['wall_count'],
+        'friends_count_from_counters': counters.get('friends'),
+        'photos_count': counters.get('photos')
+    }
+
+def iter_users_info(vk_id_pairs, client=None, counters_cache=None, refresh_counters=True):
+    """Generator version of get_users_info.
+    Yields (db_id, full_user) as soon as each user is complete, chunk by chunk."""
+    client = client or get_client()
+    if not any(token_is_set(token) for token in client.limiter.tokens):
         print("❌ Error: VK_ACCESS_TOKEN is not set in config.py")
-        return []
+        return
     
-    all_users = []
-    chunk_size = 95
     
-    for i in range(0, len(vk_id_pairs), chunk_size):
-        chunk_pairs = vk_id_pairs[i:i + chunk_size]
+    for i in range(0, len(vk_id_pairs), CHUNK_SIZE):
+        chunk_pairs = vk_id_pairs[i:i + CHUNK_SIZE]
         chunk_vk_ids = [str(pair[1]) for pair in chunk_pairs]
         user_ids_str = ','.join(chunk_vk_ids)
         
-        print(f"🔍 Requesting basic data for {len(chunk_vk_ids)} users...")
-        
-        url = "https://api.vk.com/method/users.get"
-        params = {
-            'user_ids': user_ids_str,
-            'fields': 'online,photo_200,last_seen,city,bdate,relation,counters,domain',
-            'access_token': VK_ACCESS_TOKEN,
-            'v': API_VERSION
-        }
+        logger.debug(f"🔍 Requesting basic data for {len(chunk_vk_ids)} users...")
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            data = response.json()
+            data = client.call(
+                'users.get',
+                user_ids=user_ids_str,
+                fields=USER_FIELDS
+            )
             
             if 'error' in data:
-                print(f"❌ VK API Error: {data['error']['error_msg']}")
-                time.sleep(1)
+                logger.error(f"❌ VK API Error: {data['error']['error_msg']}")
                 continue
             
             users = data['response']
             user_dict = {user['id']: user for user in users}
             
+            found_vk_ids = [vk_id for _, vk_id in chunk_pairs if vk_id in user_dict]
+            metrics.inc('users_collected_total', len(found_vk_ids))
+            if counters_cache is None:
+                chunk_counters = get_counters_batch(found_vk_ids, client)
+            else:
+                fields_by_id = counters_cache.plan([user_dict[vk_id] for vk_id in found_vk_ids], refresh_counters)
+                closed = set()
+                fetched = get_counters_batch(list(fields_by_id), client, fields_by_id, closed)
+                for vk_id, user_counters in fetched.items():
+                    counters_cache.store(user_dict[vk_id], user_counters, closed)
+                logger.debug(f" 🗃️ Counters from cache for {len(found_vk_ids) - len(fields_by_id)} of {len(found_vk_ids)} users")
+                chunk_counters = {vk_id: counters_cache.get(vk_id) for vk_id in found_vk_ids}
+            
             for db_id, vk_id in chunk_pairs:
                 if vk_id in user_dict:
-                    vk_user = user_dict[vk_id]
-                    
-                    city = vk_user.get('city', {}).get('title') or None
-                    bdate = vk_user.get('bdate')
-                    relation = vk_user.get('relation')
-                    
-                    counters = vk_user.get('counters', {})
-                    friends_count_from_counters = counters.get('friends')
-                    photos_count = counters.get('photos')
-                    # Note: followers and subscriptions often NOT included in counters
-                    
-                    friends_count = None
-                    followers_count = None
-                    subscriptions_count = None
-                    groups_count = None
-                    domain = vk_user.get('domain')
-                    
-                    print(f" 📊 Requesting additional counters for {vk_user.get('first_name', 'First Name')} {vk_user.get('last_name', 'Last Name')} (ID: {vk_id})...")
-                    
-                    try:
-                        friends_resp = requests.get("https://api.vk.com/method/friends.get", params={
-                            'user_id': vk_id,
-                            'access_token': VK_ACCESS_TOKEN,
-                            'v': API_VERSION,
-                            'count': 0,
-                            'offset': 0
-                        }, timeout=5)
-                        friends_data = friends_resp.json()
-                        if 'response' in friends_data and 'count' in friends_data['response']:
-                            friends_count = friends_data['response']['count']
-                        elif 'error' in friends_data:
-                            print(f" ⚠️ friends.get error: {friends_data['error']['error_msg']}")
-                    except Exception as e:
-                        print(f" ⚠️ friends.get exception: {e}")
-                    
-                    try:
-                        followers_resp = requests.get("https://api.vk.com/method/users.getFollowers", params={
-                            'user_id': vk_id,
-                            'access_token': VK_ACCESS_TOKEN,
-                            'v': API_VERSION,
-                            'count': 0,
-                            'offset': 0
-                        }, timeout=5)
-                        followers_data = followers_resp.json()
-                        if 'response' in followers_data and 'count' in followers_data['response']:
-                            followers_count = followers_data['response']['count']
-                        elif 'error' in followers_data:
-                            error_code = followers_data['error'].get('error_code', 0)
-                            # Error codes: 15 - Access denied, 30 - Profile private/closed
-                            if error_code in [15, 30]:
-                                print(f" ℹ️ Followers access denied or profile closed for ID {vk_id} (Error {error_code})")
-                            else:
-                                print(f" ⚠️ users.getFollowers error: {followers_data['error']['error_msg']}")
-                    except requests.exceptions.Timeout:
-                        print(f" ⚠️ Timeout users.getFollowers for ID {vk_id}")
-                    except Exception as e:
-                        print(f" ⚠️ Exception users.getFollowers for ID {vk_id}: {e}")
-                    
-                    try:
-                        subs_resp = requests.get("https://api.vk.com/method/users.getSubscriptions", params={
-                            'user_id': vk_id,
-                            'access_token': VK_ACCESS_TOKEN,
-                            'v': API_VERSION,
-                            'count': 0,
-                            'extended': 0
-                        }, timeout=5)
-                        subs_data = subs_resp.json()
-                        if 'response' in subs_data:
-                            if 'users' in subs_data['response'] and 'count' in subs_data['response']['users']:
-                                subscriptions_count = subs_data['response']['users']['count']
-                            elif 'count' in subs_data['response']:
-                                subscriptions_count = subs_data['response']['count']
-                        elif 'error' in subs_data:
-                            print(f" ⚠️ users.getSubscriptions error: {subs_data['error']['error_msg']}")
-                    except Exception as e:
-                        print(f" ⚠️ Exception users.getSubscriptions for ID {vk_id}: {e}")
-                    
-                    try:
-                        groups_resp = requests.get("https://api.vk.com/method/groups.get", params={
-                            'user_id': vk_id,
-                            'access_token': VK_ACCESS_TOKEN,
-                            'v': API_VERSION,
-                            'count': 0,
-                            'extended': 0
-                        }, timeout=5)
-                        groups_data = groups_resp.json()
-                        if 'response' in groups_data and 'count' in groups_data['response']:
-                            groups_count = groups_data['response']['count']
-                        elif 'error' in groups_data:
-                            error_code = groups_data['error'].get('error_code', 0)
-                            if error_code == 15:
-                                print(f" ℹ️ Group access denied for ID {vk_id} (Private)")
-                            elif error_code == 30:
-                                print(f" ℹ️ Profile ID {vk_id} is closed or blocked")
-                            else:
-                                print(f" ⚠️ groups.get error: {groups_data['error']['error_msg']}")
-                    except requests.exceptions.Timeout:
-                        print(f" ⚠️ Timeout groups.get for ID {vk_id}")
-                    except Exception as e:
-                        print(f" ⚠️ Exception groups.get for ID {vk_id}: {e}")
-                    
-                    wall_count = None
-                    print(f" 🧱 Getting wall post count for {vk_user.get('first_name', 'First Name')} {vk_user.get('last_name', 'Last Name')} (ID: {vk_id})...")
-                    try:
-                        wall_resp = requests.get("https://api.vk.com/method/wall.get", params={
-                            'owner_id': vk_id,
-                            'count': 0,
-                            'access_token': VK_ACCESS_TOKEN,
-                            'v': API_VERSION
-                        }, timeout=5)
-                        wall_data = wall_resp.json()
-                        if 'response' in wall_data:
-                            wall_count = wall_data['response']['count']
-                            print(f" ✅ Wall posts: {wall_count}")
-                        elif 'error' in wall_data:
-                            error_code = wall_data['error'].get('error_code', 0)
-                            # Error codes: 15 - Access denied, 30 - Profile private/closed
-                            if error_code in [15, 30]:
-                                print(f" ℹ️ Wall is closed or inaccessible for ID {vk_id} (Error {error_code})")
-                            else:
-                                print(f" ⚠️ wall.get error: {wall_data['error']['error_msg']}")
-                    except requests.exceptions.Timeout:
-                        print(f" ⚠️ Timeout wall.get for ID {vk_id}")
-                    except Exception as e:
-                        print(f" ⚠️ Exception wall.get for ID {vk_id}: {e}")
-                    
-                    full_user = {
-                        'id': vk_id,
-                        'name': f"{vk_user.get('first_name', 'First Name')} {vk_user.get('last_name', 'Last Name')}",
-                        'online': vk_user.get('online', 0),
-                        'photo_200': vk_user.get('photo_200', 'https://vk.com/images/camera_200.png'),
-                        'last_seen': vk_user.get('last_seen'),
-                        'city': city,
-                        'bdate': bdate,
-                        'relation': relation,
-                        'friends_count': friends_count,
-                        'followers_count': followers_count,
-                        'subscriptions_count': subscriptions_count,
-                        'groups_count': groups_count,
-                        'domain': domain,
-                        'wall_count': wall_count,
-                        'friends_count_from_counters': friends_count_from_counters,
-                        'photos_count': photos_count
-                    }
-                    all_users.append(full_user)
-                    
-                    if APP_MODE == 'db':
-                        print(f"💾 Save data for {full_user['name']} to db...")
-                        save_to_db(db_id, full_user)
-                        time.sleep(1)
-                    else:
-                        print(f"🧠 Data for {full_user['name']} load (mode 'memory')")
-                    
-                    print(f" ✅ Processed: {full_user['name']} (Friends: {friends_count}, Followers: {followers_count})")
-                    time.sleep(1)
+                    yield db_id, build_full_user(user_dict[vk_id], chunk_counters[vk_id])
                 else:
-                    print(f"⚠️ Failed to get basic data for VK ID: {vk_id}")
+                    logger.warning(f"⚠️ Failed to get basic data for VK ID: {vk_id}")
         
         except Exception as e:
-            print(f"❌ Error in main API request: {e}")
-        
-        time.sleep(1)
+            logger.error(f"❌ Error in main API request: {e}")
+
+def get_users_info(vk_id_pairs, client=None, counters_cache=None, refresh_counters=True, progress=None):
+    """Requests basic information and additional counters.
+    With counters_cache (counters_cache.CountersCache) only expired counters are
+    requested; with refresh_counters=False only users missing from the cache.
+    Cached values are carried forward into full_user.
+    In 'db' mode users are saved by a background DBWriter while fetching goes on.
+    progress(done) is called after every processed user."""
+    all_users = []
+    writer = DBWriter().start() if APP_MODE == 'db' else None
+    
+    try:
+        for db_id, full_user in iter_users_info(vk_id_pairs, client, counters_cache, refresh_counters):
+            all_users.append(full_user)
+            
+            if writer:
+                logger.debug(f"💾 Save data for {full_user['name']} to db...")
+                writer.put(db_id, full_user)
+            else:
+                logger.debug(f"🧠 Data for {full_user['name']} load (mode 'memory')")
+            
+            logger.debug(f" ✅ Processed: {full_user['name']} (Friends: {full_user['friends_count']}, Followers: {full_user['followers_count']})")
+            if progress:
+                progress(len(all_users))
+    finally:
+        if writer:
+            writer.close()
     
     return all_users
 
-def download_photo(url):
+def save_users_info(vk_id_pairs, client=None, counters_cache=None, refresh_counters=True, progress=None):
+    """Streams users from iter_users_info straight into the DB without keeping them in memory.
+    Returns the number of users collected."""
+    collected = 0
+    with DBWriter() as writer:
+        for db_id, full_user in iter_users_info(vk_id_pairs, client, counters_cache, refresh_counters):
+            writer.put(db_id, full_user)
+            collected += 1
+            logger.debug(f" ✅ Processed: {full_user['name']} (Friends: {full_user['friends_count']}, Followers: {full_user['followers_count']})")
+            if progress:
+                progress(collected)
+    return collected
+
+def download_photo(url, client=None, use_cache=True):
     """Downloads photo by URL.
+    With use_cache the on-disk photo cache is used, so unchanged photos are not downloaded again,
+    and (with PHOTO_THUMBNAILS) the compact re-encoded thumbnail is returned.
     Returns binary data (bytes) or None in case of error."""
+    client = client or get_client()
+    if use_cache:
+        return get_photo_cache().get(url, client)
     try:
-        print(f"📥 Downloading photo: {url}")
-        response = requests.get(url, timeout=5)
-        print(f"   → Status: {response.status_code}, Content-Type: {response.headers.get('content-type')}")
+        logger.debug(f"📥 Downloading photo: {url}")
+        response = client.get(url)
+        logger.debug(f"   → Status: {response.status_code}, Content-Type: {response.headers.get('content-type')}")
         
         if response.status_code == 200:
             content_type = response.headers.get('content-type', '')
             if 'image' in content_type:
-                print(f"   → Photo downloaded ({len(response.content)} bytes)")
+                logger.debug(f"   → Photo downloaded ({len(response.content)} bytes)")
                 return response.content
             else:
-                print(f"   ⚠️ URL is not an image: {content_type}")
+                logger.warning(f"   ⚠️ URL is not an image: {content_type}")
                 return None
         else:
-            print(f"   ⚠️ Photo download error: {response.status_code}")
+            logger.warning(f"   ⚠️ Photo download error: {response.status_code}")
             return None
     except Exception as e:
-        print(f"   ⚠️ Photo download exception: {e}")
+        logger.warning(f"   ⚠️ Photo download exception: {e}")
         return None
 
 if __name__ == "__main__":
@@ -0,0 +1,140 @@
+# vk_api_async.py
+import asyncio
+import logging
+import aiohttp
+from config import (
+    VK_ACCESS_TOKENS, API_VERSION, APP_MODE,
+    VK_POOL_SIZE, VK_RPS, VK_MAX_RETRIES
+)
+from db_writer import DBWriter
+from rate_limit import RateLimitManager, is_throttled
+from metrics import metrics, vk_result
+from vk_api import (
+    API_URL, USER_FIELDS, CHUNK_SIZE, DEFAULT_TIMEOUT, METHOD_TIMEOUTS,
+    build_counters_code, pack_counter_batches, parse_counters_response, build_full_user, token_is_set
+)
+
+logger = logging.getLogger(__name__)
+
+async def call_method(session, limiter, method, api_url=None, **params):
+    """Calls VK API method with a token from the shared RateLimitManager.
+    Rate limit errors are retried with backoff. api_url defaults to API_URL.
+    Returns decoded JSON (dict with 'response' or 'error' key)."""
+    url = (api_url or API_URL) + method
+    timeout = aiohttp.ClientTimeout(total=METHOD_TIMEOUTS.get(method, DEFAULT_TIMEOUT))
+    for attempt in range(limiter.max_retries + 1):
+        token = await limiter.acquire_async()
+        request_params = {'access_token': token, 'v': API_VERSION}
+        request_params.update(params)
+        with metrics.timer('vk_api_request_seconds', method=method, result='ok') as timer:
+            try:
+                async with session.get(url, params=request_params, timeout=timeout) as response:
+                    data = await response.json(content_type=None)
+            except asyncio.TimeoutError:
+                timer.labels['result'] = 'timeout'
+                raise
+            timer.labels['result'] = vk_result(data)
+
+        if not is_throttled(data) or attempt == limiter.max_retries:
+            return data
+
+        delay = limiter.backoff(token, attempt)
+        logger.warning(f" ⏳ {method}: {data['error'].get('error_msg')} (Error {data['error']['error_code']}), "
+                       f"retry {attempt + 1}/{limiter.max_retries} in {delay:.1f}s")
+
+async def get_counters_async(session, limiter, vk_ids, fields_by_id=None, closed=None, api_url=None):
+    """Async version of vk_api.get_counters_batch for one execute batch."""
+    data = {}
+    try:
+        data = await call_method(session, limiter, 'execute', api_url, code=build_counters_code(vk_ids, fields_by_id))
+    except asyncio.TimeoutError:
+        logger.warning(f" ⚠️ Timeout execute for IDs {vk_ids}")
+    except Exception as e:
+        logger.warning(f" ⚠️ Exception execute for IDs {vk_ids}: {e}")
+    return parse_counters_response(vk_ids, data, fields_by_id, closed)
+
+async def process_chunk(session, limiter, chunk_pairs, counters_cache=None, writer=None, refresh_counters=True,
+                        api_url=None):
+    """users.get for one chunk, then all its counter batches concurrently."""
+    chunk_users = []
+    user_ids_str = ','.join(str(pair[1]) for pair in chunk_pairs)
+    logger.debug(f"🔍 Requesting basic data for {len(chunk_pairs)} users...")
+
+    try:
+        data = await call_method(session, limiter, 'users.get', api_url, user_ids=user_ids_str, fields=USER_FIELDS)
+        if 'error' in data:
+            logger.error(f"❌ VK API Error: {data['error']['error_msg']}")
+            return chunk_users
+
+        user_dict = {user['id']: user for user in data['response']}
+        found_vk_ids = [vk_id for _, vk_id in chunk_pairs if vk_id in user_dict]
+        metrics.inc('users_collected_total', len(found_vk_ids))
+        fields_by_id = None
+        if counters_cache is not None:
+            fields_by_id = counters_cache.plan([user_dict[vk_id] for vk_id in found_vk_ids], refresh_counters)
+        batches = pack_counter_batches(found_vk_ids, fields_by_id)
+
+        closed = set()
+        chunk_counters = {}
+        for batch_counters in await asyncio.gather(
+                *(get_counters_async(session, limiter, batch, fields_by_id, closed, api_url) for batch in batches)):
+            chunk_counters.update(batch_counters)
+
+        if counters_cache is not None:
+            for vk_id, user_counters in chunk_counters.items():
+                counters_cache.store(user_dict[vk_id], user_counters, closed)
+            chunk_counters = {vk_id: counters_cache.get(vk_id) for vk_id in found_vk_ids}
+
+        loop = asyncio.get_running_loop()
+        for db_id, vk_id in chunk_pairs:
+            if vk_id in user_dict:
+                full_user = build_full_user(user_dict[vk_id], chunk_counters[vk_id])
+                chunk_users.append(full_user)
+
+                if writer:
+                    logger.debug(f"💾 Save data for {full_user['name']} to db...")
+                    await loop.run_in_executor(None, writer.put, db_id, full_user)
+                else:
+                    logger.debug(f"🧠 Data for {full_user['name']} load (mode 'memory')")
+
+                logger.debug(f" ✅ Processed: {full_user['name']} (Friends: {full_user['friends_count']}, Followers: {full_user['followers_count']})")
+            else:
+                logger.warning(f"⚠️ Failed to get basic data for VK ID: {vk_id}")
+
+    except Exception as e:
+        logger.error(f"❌ Error in main API request: {e}")
+
+    return chunk_users
+
+async def get_users_info_async(vk_id_pairs, rps=VK_RPS, tokens=None, counters_cache=None, refresh_counters=True,
+                               api_url=None):
+    """Async variant of vk_api.get_users_info.
+    All requests run concurrently, paced by `rps` requests per second for every token.
+    refresh_counters=False requests counters only for users missing from counters_cache.
+    api_url overrides API_URL (like VKClient's api_url).
+    Returns the same full_user dicts in the same order."""
+    tokens = [token for token in (tokens or VK_ACCESS_TOKENS) if token_is_set(token)]
+    if not tokens:
+        print("❌ Error: VK_ACCESS_TOKEN is not set in config.py")
+        return []
+
+    limiter = RateLimitManager(tokens, rps, VK_MAX_RETRIES)
+    chunks = [vk_id_pairs[i:i + CHUNK_SIZE] for i in range(0, len(vk_id_pairs), CHUNK_SIZE)]
+
+    writer = DBWriter().start() if APP_MODE == 'db' else None
+    connector = aiohttp.TCPConnector(limit=VK_POOL_SIZE)
+    try:
+        async with aiohttp.ClientSession(connector=connector) as session:
+            results = await asyncio.gather(
+                *(process_chunk(session, limiter, chunk, counters_cache, writer, refresh_counters, api_url)
+                  for chunk in chunks))
+    finally:
+        if writer:
+            writer.close()
+
+    return [user for chunk_users in results for user in chunk_users]
+
+def get_users_info_concurrent(vk_id_pairs, rps=VK_RPS, tokens=None, counters_cache=None, refresh_counters=True,
+                              api_url=None):
+    """Synchronous entry point for get_users_info_async."""
+    return asyncio.run(get_users_info_async(vk_id_pairs, rps, tokens, counters_cache, refresh_counters, api_url))
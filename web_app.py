@@ -1,16 +1,37 @@
 # web_app.py
-import subprocess
-import sys
+import gzip
+import hashlib
 import os
 from flask import Flask, flash, render_template, request, redirect, url_for, flash, jsonify, send_from_directory, abort
-from database import (
+from storage import (
     add_vk_user, load_vk_ids, delete_vk_user, load_user_visits_for_chart,
     load_archived_users, restore_user_from_archive, load_activity_stats,
     load_weekly_activity_stats, load_city_activity_stats
 )
-from config import FLASK_HOST, FLASK_PORT, FLASK_DEBUG, SECRET_KEY, APP_MODE
+from config import FLASK_HOST, FLASK_PORT, FLASK_DEBUG, SECRET_KEY, APP_MODE, PHOTO_CACHE_DIR, COLLECTOR_TIMEOUT
 from datetime import datetime
 from config import OUTPUT_HTML
+from collector_daemon import send_command
+from counters_cache import CountersCache
+from main import collect_users, render_pages
+from refresh_jobs import RefreshJobs
+from vk_api import get_client
+from metrics import metrics, instrument
+from utils import setup_logging
+from visits import to_sessions, filter_range, downsample, as_timestamp
+
+GZIP_MIN_BYTES = 1024
+
+load_vk_ids = instrument(load_vk_ids, 'db_call_seconds', function='load_vk_ids')
+load_archived_users = instrument(load_archived_users, 'db_call_seconds', function='load_archived_users')
+load_user_visits_for_chart = instrument(
+    load_user_visits_for_chart, 'db_call_seconds', function='load_user_visits_for_chart'
+)
+load_activity_stats = instrument(load_activity_stats, 'db_call_seconds', function='load_activity_stats')
+load_weekly_activity_stats = instrument(
+    load_weekly_activity_stats, 'db_call_seconds', function='load_weekly_activity_stats'
+)
+load_city_activity_stats = instrument(load_city_activity_stats, 'db_call_seconds', function='load_city_activity_stats')
 
 app = Flask(__name__)
 app.secret_key = SECRET_KEY
@@ -22,56 +43,106 @@ def index():
     archived_users = load_archived_users(50)
     return render_template('index.html', users=active_users, archived_users=archived_users)
 
+def run_refresh(job):
+    """Collection for a refresh job: through the collector daemon when it runs
+    (warm process, no per-user progress), otherwise in this process.
+    A daemon collection that does not finish in COLLECTOR_TIMEOUT fails the job."""
+    reply = send_command('collect', wait=True, timeout=COLLECTOR_TIMEOUT)
+    if reply is not None:
+        if reply.get('status') != 'ok':
+            raise RuntimeError(reply.get('message', 'Collector daemon error'))
+        collected = reply.get('result', {}).get('collected') or 0
+        job.total = job.done = collected
+        return f"Collector daemon: {reply.get('message')}"
+
+    vk_id_pairs = load_vk_ids()
+    job.total = len(vk_id_pairs)
+    if not vk_id_pairs:
+        return "User list is empty"
+
+    client = get_client()
+    requests_before, errors_before = client.requests, client.errors
+    counters_cache = CountersCache.load()
+
+    def progress(done):
+        job.advance(done, client.requests - requests_before, client.errors - errors_before)
+
+    users_data_from_api, collected = collect_users(vk_id_pairs, counters_cache, progress=progress)
+    counters_cache.save()
+    render_pages(users_data_from_api)
+    return f"Collected {collected} of {len(vk_id_pairs)} users"
+
+refresh_jobs = RefreshJobs(run_refresh)
+
+@app.route('/api/refresh', methods=['POST'])
+def api_start_refresh():
+    """Starts a background refresh (or joins the running one) and returns its job id."""
+    job, started = refresh_jobs.submit()
+    print(f"🔄 /api/refresh: {'started' if started else 'joined'} job {job.id}")
+    return jsonify(dict(job.to_dict(), coalesced=not started)), 202
+
+@app.route('/api/refresh/<job_id>')
+def api_refresh_status(job_id):
+    """Progress of a refresh job: users done/total, API calls, errors, ETA."""
+    job = refresh_jobs.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": f"Job {job_id} not found"}), 404
+    return jsonify(job.to_dict())
+
 @app.route('/run-main-py', methods=['POST'])
 def run_main_py():
-    """Runs main.py as a subprocess and returns the result."""
-    try:
-        print("🔄 /run-main-py: Starting main.py...")
-        # - Get the path to main.py relative to the current file -
-        main_script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
-
-        if not os.path.exists(main_script_path):
-            error_msg = f"❌ /run-main-py: File main.py not found at path: {main_script_path}"
-            print(error_msg)
-            return jsonify({"status": "error", "message": error_msg}), 404
-
-        # - Run main.py as a subprocess -
-        # Using the same Python interpreter as for web_app.py
-        result = subprocess.run(
-            [sys.executable, main_script_path],
-            capture_output=True,
-            text=True,
-            timeout=300  # Timeout 5 minutes (300 seconds)
-        )
+    """Kept for old pages: starts a background refresh like /api/refresh."""
+    return api_start_refresh()
 
-        if result.returncode == 0:
-            success_msg = "✅ /run-main-py: main.py executed successfully!"
-            print(success_msg)
-            print(" → stdout:", result.stdout[-500:])  # Print last 500 characters of stdout
-            return jsonify({"status": "success", "message": success_msg})
-        else:
-            error_msg = result.stderr[-1000:] if result.stderr else "Unknown error"
-            print(f"❌ /run-main-py: Error executing main.py (code {result.returncode})")
-            print(" → stderr:", error_msg)
-            return jsonify({"status": "error", "message": f"main.py finished with error: {error_msg}"}), 500
-
-    except subprocess.TimeoutExpired:
-        error_msg = "⏳ /run-main-py: main.py is taking too long (> 5 minutes) and was terminated."
-        print(error_msg)
-        return jsonify({"status": "error", "message": error_msg}), 408  # 408 Request Timeout
+def compressed_json(data, cache_control='no-cache'):
+    """JSON response with an ETag (304 when the client has it) and gzip
+    when the client accepts it and the body is worth compressing.
+    The ETag names the encoding too, since gzip and identity bodies differ."""
+    body = app.json.dumps(data).encode('utf-8')  # same encoding (dates etc.) as jsonify
+    etag = hashlib.sha1(body).hexdigest()
+    use_gzip = len(body) > GZIP_MIN_BYTES and request.accept_encodings['gzip'] > 0
+    if use_gzip:
+        body = gzip.compress(body, compresslevel=6)
+        etag += '-gzip'
+    response = app.response_class(body, mimetype='application/json')
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    response.vary.add('Accept-Encoding')
+    return response.make_conditional(request)
 
-    except Exception as e:
-        import traceback
-        error_msg = f"❌ /run-main-py: Failed to run main.py: {e}"
-        print(error_msg)
-        print(traceback.format_exc())
-        return jsonify({"status": "error", "message": error_msg}), 500
+def parse_max_points():
+    """?max_points= as a positive int, None when absent. Raises ValueError on bad values."""
+    value = request.args.get('max_points')
+    if value is None or value == '':
+        return None
+    max_points = int(value)
+    if max_points < 1:
+        raise ValueError(f"max_points should be positive, got {max_points}")
+    return max_points
+
+def parse_time_arg(name):
+    value = request.args.get(name)
+    return as_timestamp(value) if value else None
 
 @app.route('/api/user_visits/<int:user_id>')
 def api_get_user_visits(user_id):
+    """Visit history for the chart.
+    ?from=&to= (epoch seconds or ISO time) limit the window, ?max_points= downsamples it,
+    ?format=sessions returns run-length intervals (start, end, state) instead of every poll."""
+    try:
+        start, end = parse_time_arg('from'), parse_time_arg('to')
+        max_points = parse_max_points()
+    except ValueError as e:
+        return jsonify({"status": "error", "message": f"Bad query parameter: {e}"}), 400
     try:
-        visits = load_user_visits_for_chart(user_id)
-        return jsonify(visits)
+        visits = filter_range(load_user_visits_for_chart(user_id), start, end)
+        if request.args.get('format') == 'sessions':
+            return compressed_json(to_sessions(visits))
+        if max_points:
+            visits = downsample(visits, max(2, max_points))
+        return compressed_json(visits)
     except Exception as e:
         print(f"❌ Error loading visit data for user_id={user_id}: {e}")
         return jsonify([]), 500  # Return empty array and 500 code in case of error
@@ -90,6 +161,13 @@ def monitoring_page():
         print(f"❌ Error serving HTML page: {e}")
         abort(500)
 
+@app.route('/photo_cache/blobs/<path:filename>')
+def cached_photo(filename):
+    """Serves avatars from the photo cache referenced by the monitoring page.
+    Only blobs/ is exposed: the index and its lock file stay private."""
+    blobs_dir = os.path.join(os.path.abspath(PHOTO_CACHE_DIR), 'blobs')
+    return send_from_directory(blobs_dir, filename, max_age=7 * 24 * 3600)
+
 @app.route('/statistics')
 def statistics():
     """Page with user activity statistics."""
@@ -173,26 +251,20 @@ def delete_user(user_db_id):
 
 @app.route('/run-monitoring')
 def run_monitoring():
-    try:
-        print(f"🔄 /run-monitoring: load main.py in mode {APP_MODE.upper()}...")
-        main_script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
-        result = subprocess.run(
-            [sys.executable, main_script_path], 
-            capture_output=True, 
-            text=True, 
-            timeout=60
-        )
-        if result.returncode == 0:
-            flash("✅ Monitoring completed successfully!", "success")
-        else:
-            error_msg = result.stderr[:500]  # Limit length for security
-            flash(f"❌ Error during monitoring execution: {error_msg}", "error")
-    except subprocess.TimeoutExpired:
-        flash("⏳ Monitoring is taking too long and was terminated.", "error")
-    except Exception as e:
-        flash(f"❌ Failed to start monitoring: {e}", "error")
+    print(f"🔄 /run-monitoring: refresh in mode {APP_MODE.upper()}...")
+    job, started = refresh_jobs.submit()
+    if started:
+        flash(f"🔄 Monitoring started in background (job {job.id}).", "success")
+    else:
+        flash(f"⏳ Monitoring is already running (job {job.id}): {job.done}/{job.total} users.", "success")
     return redirect(url_for('index'))
 
+@app.route('/metrics')
+def prometheus_metrics():
+    """Timings and call counts of this process in Prometheus text format."""
+    return metrics.prometheus(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
 if __name__ == '__main__':
+    setup_logging()
     print("🚀 Starting Flask web interface for user management...")
     app.run(host=FLASK_HOST, port=FLASK_PORT, debug=FLASK_DEBUG)